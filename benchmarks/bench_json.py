@@ -0,0 +1,70 @@
+"""
+Compare JSON backends on payloads typical for aCT client.
+
+Payloads are a job status listing as returned by GET /jobs and job
+descriptions as sent by PUT /jobs. Only installed backends are measured.
+
+Usage:
+    python benchmarks/bench_json.py [--jobs N] [--repeat N]
+"""
+
+import argparse
+import time
+
+from act_client.codec import JSONCodec, getAvailableBackends
+
+
+def makeStatRows(numJobs):
+    return [
+        {
+            'c_id': i,
+            'c_jobname': f'job_{i}',
+            'a_JobID': f'https://arc.example.org:443/arex/{i:060d}',
+            'a_State': 'Finished',
+            'a_arcstate': 'done',
+            'a_cluster': 'https://arc.example.org/cpu',
+        }
+        for i in range(numJobs)
+    ]
+
+
+def makeSubmitDescs(numJobs):
+    desc = '&(executable="run.sh")(jobname="bench")(inputfiles=("run.sh" "")("data.tar.gz" ""))(stdout="out.txt")'
+    return [{'id': i, 'desc': desc} for i in range(numJobs)]
+
+
+def timeit(fun, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fun(arg)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = {
+        'stat': makeStatRows(args.jobs),
+        'submit': makeSubmitDescs(args.jobs),
+    }
+
+    print(f'{"backend": <8} {"payload": <8} {"size MB": >8} {"dumps s": >8} {"loads s": >8}')
+    for backend in getAvailableBackends():
+        codec = JSONCodec(backend)
+        for name, payload in payloads.items():
+            encoded = codec.dumps(payload)
+            dumpTime = timeit(codec.dumps, payload, args.repeat)
+            loadTime = timeit(codec.loads, encoded, args.repeat)
+            size = len(encoded) / 2 ** 20
+            print(f'{backend: <8} {name: <8} {size: >8.2f} {dumpTime: >8.3f} {loadTime: >8.3f}')
+
+
+if __name__ == '__main__':
+    main()
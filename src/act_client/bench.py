@@ -0,0 +1,132 @@
+"""
+Benchmarks of client operations against local mock server.
+
+Every operation is run on a fresh MockServer with the given number of jobs.
+Requests and transferred bytes are counted with a tracer and reported with
+wall time so that regressions in either can be spotted. CPU time is measured
+for the thread that runs the operation, which excludes the mock server
+running in other threads, and uploaded bytes per CPU second show the cost of
+sending input files.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from act_client.common import ACTClientError
+from act_client.mockserver import DEFAULT_CLUSTER, MockServer
+from act_client.operations import ACTRest, WebDAVClient
+from act_client.tracing import Tracer
+
+OPERATIONS = ('sub', 'stat', 'get', 'kill', 'clean')
+
+
+class SpanCounter:
+    """Tracer callback that sums requests and bytes of spans."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytesIn = 0
+        self.bytesOut = 0
+
+    def __call__(self, span):
+        with self.lock:
+            self.requests += 1
+            self.bytesIn += span['bytesIn'] or 0
+            self.bytesOut += span['bytesOut'] or 0
+
+
+def runBenchmark(op, numJobs, webdav=False, **serverArgs):
+    if op not in OPERATIONS:
+        raise ACTClientError(f'Unknown benchmark operation {op}')
+
+    server = MockServer(**serverArgs)
+    server.start()
+    counter = SpanCounter()
+    tracer = Tracer([counter])
+    actrest = ACTRest(server.url, token='mocktoken', tracer=tracer)
+    tmpdir = tempfile.mkdtemp(prefix='act-bench-')
+    try:
+        if op == 'sub':
+            descs = _writeDescs(tmpdir, numJobs, serverArgs.get('fileSize', 1024))
+            ids = None
+        else:
+            ids = server.addJobs(numJobs)
+
+        # operations print progress which is not part of benchmark
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            cpuStart = _threadTime()
+            if op == 'sub':
+                webdavClient = webdavBase = None
+                if webdav:
+                    webdavBase = f'{server.url}/webdav/bench'
+                    webdavClient = WebDAVClient(webdavBase, tracer=tracer)
+                try:
+                    actrest.submitJobs(descs, [DEFAULT_CLUSTER], webdavClient, webdavBase)
+                finally:
+                    if webdavClient:
+                        webdavClient.close()
+            elif op == 'stat':
+                for _ in actrest.iterJobStats(jobids=ids, clienttab=['id', 'jobname'], arctab=['JobID', 'State', 'arcstate']):
+                    pass
+            elif op == 'get':
+                for jobid in ids:
+                    _, errors = actrest.downloadJobResults(jobid, os.path.join(tmpdir, str(jobid)))
+                    if errors:
+                        raise ACTClientError(f'Error downloading job {jobid}: {errors[0]}')
+            elif op == 'kill':
+                for _ in actrest.iterKillJobs(jobids=ids):
+                    pass
+            elif op == 'clean':
+                for _ in actrest.iterCleanJobs(jobids=ids):
+                    pass
+            elapsed = time.perf_counter() - start
+            cpu = _threadTime() - cpuStart
+    finally:
+        actrest.close()
+        server.stop()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    return {
+        'op': op,
+        'jobs': numJobs,
+        'seconds': elapsed,
+        'jobsPerSecond': numJobs / elapsed if elapsed else None,
+        'requests': counter.requests,
+        'bytesIn': counter.bytesIn,
+        'bytesOut': counter.bytesOut,
+        'MBPerSecond': (counter.bytesIn + counter.bytesOut) / 2 ** 20 / elapsed if elapsed else None,
+        'cpuSeconds': cpu,
+        'MBOutPerCPUSecond': counter.bytesOut / 2 ** 20 / cpu if cpu else None,
+    }
+
+
+def _threadTime():
+    # time.thread_time() is only available since Python 3.7
+    try:
+        return time.thread_time()
+    except AttributeError:
+        return time.clock_gettime(time.CLOCK_THREAD_CPUTIME_ID)
+
+
+def _writeDescs(dirname, numJobs, inputSize):
+    # all jobs share the same input file like typical bulk submissions
+    inputPath = os.path.join(dirname, 'input.dat')
+    with open(inputPath, 'wb') as f:
+        f.write(b'\0' * inputSize)
+    descs = []
+    for i in range(numJobs):
+        path = os.path.join(dirname, f'job{i}.xrsl')
+        with open(path, 'w') as f:
+            f.write(
+                f'&(executable="/bin/true")(jobname="bench{i}")'
+                f'(inputfiles=("input.dat" "{inputPath}"))(stdout="stdout.txt")'
+            )
+        descs.append(path)
+    return descs
@@ -1,15 +1,27 @@
 import argparse
+import collections
+import concurrent.futures
+import io
 import json
 import os
+import queue
 import sys
-
-from pyarcrest.http import HTTPClient
-
-from act_client.common import (HTTP_BUFFER_SIZE, ACTClientError, disableSIGINT,
-                               getIDParam, getWebDAVBase)
+import threading
+import time
+
+from act_client.common import (CAT_PREFETCH_SIZE, CLEAN_BATCH_SIZE,
+                               CLEAN_INTERVAL, DOWNLOAD_CONNECTIONS,
+                               FINAL_STATES, RETRIES, TAIL_BYTES,
+                               ACTClientError, disableSIGINT, getByteRange,
+                               getIDParam, getStates, getWebDAVBase)
 from act_client.config import checkConf, expandPaths, loadConf
-from act_client.operations import (SubmissionInterrupt, getACTRestClient,
-                                   getWebDAVClient)
+from act_client.credentials import (clearCredCache, getProxyInfo,
+                                    isDelegated, loadCredCache,
+                                    storeCredCache)
+from act_client.journal import SubmissionJournal
+from act_client.operations import (ARCSessionFetcher, SubmissionInterrupt,
+                                   getACTRestClient, getWebDAVClient)
+from act_client.progress import Progress
 
 
 def addCommonArgs(parser):
@@ -37,6 +49,18 @@ def addCommonArgs(parser):
         action='store_true',
         help='output debug logs'
     )
+    parser.add_argument(
+        '--trace',
+        default=None,
+        type=str,
+        help='append timing of every HTTP request to given JSON lines file'
+    )
+    parser.add_argument(
+        '--retries',
+        default=None,
+        type=int,
+        help=f'number of retries of requests that fail transiently (default {RETRIES})'
+    )
 
 
 def addCommonJobFilterArgs(parser):
@@ -60,12 +84,24 @@ def addCommonJobFilterArgs(parser):
     )
 
 
-def addStateArg(parser):
+def addStateArg(parser, multiple=False):
+    if multiple:
+        helpStr = 'perform command only on jobs in given state or comma separated states'
+    else:
+        helpStr = 'perform command only on jobs in given state'
     parser.add_argument(
         '-s',
         '--state',
         default='',
-        help='perform command only on jobs in given state'
+        help=helpStr
+    )
+
+
+def addPlanArg(parser):
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='show affected jobs and data and ask for confirmation first'
     )
 
 
@@ -97,19 +133,21 @@ def createParser():
     addCommonJobFilterArgs(parserClean)
     addStateArg(parserClean)
     addWebDAVArg(parserClean)
+    addPlanArg(parserClean)
 
     parserFetch = subparsers.add_parser(
         'fetch',
         help='fetch failed jobs'
     )
     addCommonJobFilterArgs(parserFetch)
+    addPlanArg(parserFetch)
 
     parserGet = subparsers.add_parser(
         'get',
         help='download results of done and donefailed jobs'
     )
     addCommonJobFilterArgs(parserGet)
-    addStateArg(parserGet)
+    addStateArg(parserGet, multiple=True)
     addWebDAVArg(parserGet)
     parserGet.add_argument(
         '--use-jobname',
@@ -121,6 +159,51 @@ def createParser():
         action='store_true',
         help='do not clean jobs'
     )
+    parserGet.add_argument(
+        '--no-archive',
+        action='store_true',
+        help='always download result files one by one instead of as archive'
+    )
+    parserGet.add_argument(
+        '--manifest',
+        default=None,
+        help='append ID, name and directory of downloaded jobs to given JSON lines file'
+    )
+    parserGet.add_argument(
+        '--include',
+        action='append',
+        default=[],
+        help='download only result files whose path matches glob pattern (can be repeated)'
+    )
+    parserGet.add_argument(
+        '--exclude',
+        action='append',
+        default=[],
+        help='do not download result files or directories whose path matches glob pattern (can be repeated)'
+    )
+    parserGet.add_argument(
+        '--watch',
+        action='store_true',
+        help='keep downloading jobs as they finish until interrupted'
+    )
+    parserGet.add_argument(
+        '--interval',
+        default=60,
+        type=float,
+        help='seconds between checks for finished jobs with --watch'
+    )
+    parserGet.add_argument(
+        '--parallel',
+        default=4,
+        type=int,
+        help='number of jobs downloaded at the same time with --watch'
+    )
+    parserGet.add_argument(
+        '--connections',
+        default=DOWNLOAD_CONNECTIONS,
+        type=int,
+        help='number of parallel connections for downloading large files'
+    )
 
     parserKill = subparsers.add_parser(
         'kill',
@@ -129,24 +212,31 @@ def createParser():
     addCommonJobFilterArgs(parserKill)
     addStateArg(parserKill)
     addWebDAVArg(parserKill)
+    addPlanArg(parserKill)
 
     parserProxy = subparsers.add_parser(
         'proxy',
         help='submit proxy certificate'
     )
+    parserProxy.add_argument(
+        '--force',
+        action='store_true',
+        help='delegate proxy even if the same proxy is already delegated'
+    )
 
     parserResub = subparsers.add_parser(
         'resub',
         help='resubmit failed jobs'
     )
     addCommonJobFilterArgs(parserResub)
+    addPlanArg(parserResub)
 
     parserStat = subparsers.add_parser(
         'stat',
         help='print status for jobs'
     )
     addCommonJobFilterArgs(parserStat)
-    addStateArg(parserStat)
+    addStateArg(parserStat, multiple=True)
     parserStat.add_argument(
         '--arc',
         default='JobID,State,arcstate',
@@ -162,6 +252,11 @@ def createParser():
         action='store_true',
         help='get a list of possible columns from server'
     )
+    parserStat.add_argument(
+        '--summary',
+        action='store_true',
+        help='print the number of jobs per arcstate, State and cluster'
+    )
 
     parserSub = subparsers.add_parser(
         'sub',
@@ -173,9 +268,19 @@ def createParser():
         default='default',
         help='a name of a list of clusters specified in config under "clusters" option OR a comma separated list of cluster URLs'
     )
+    parserSub.add_argument(
+        '--journal',
+        default='',
+        help='file that records progress of submission so it can be resumed'
+    )
+    parserSub.add_argument(
+        '--resume',
+        action='store_true',
+        help='continue interrupted submission recorded in journal given with --journal'
+    )
     parserSub.add_argument(
         'xRSL',
-        nargs='+',
+        nargs='*',
         help='path to job description file'
     )
 
@@ -184,7 +289,7 @@ def createParser():
         help='print stdout or stderr of the job'
     )
     addCommonJobFilterArgs(parserCat)
-    addStateArg(parserCat)
+    addStateArg(parserCat, multiple=True)
     parserCat.add_argument(
         '-o', '--stdout', action='store_true', default=True,
         help='print job\'s stdout'
@@ -193,11 +298,116 @@ def createParser():
         '-e', '--stderr', action='store_true',
         help='print job\'s stderr'
     )
+    parserCat.add_argument(
+        '--connections',
+        default=DOWNLOAD_CONNECTIONS,
+        type=int,
+        help='number of parallel connections per ARC cluster'
+    )
+    catRangeGroup = parserCat.add_mutually_exclusive_group()
+    catRangeGroup.add_argument(
+        '--tail',
+        default=None,
+        type=int,
+        help='print only the last N lines'
+    )
+    catRangeGroup.add_argument(
+        '--bytes',
+        default=None,
+        help='print only the given byte range: start-end, start- or -N for last N bytes'
+    )
+    parserCat.add_argument(
+        '-f', '--follow',
+        action='store_true',
+        help='keep printing new output until interrupted'
+    )
+    parserCat.add_argument(
+        '--interval',
+        default=10,
+        type=float,
+        help='seconds between checks for new output with --follow'
+    )
+    parserCat.add_argument(
+        '--interleave',
+        action='store_true',
+        help='print lines as they arrive prefixed with job ID and name'
+    )
+
+    parserBench = subparsers.add_parser(
+        'bench',
+        help='benchmark client operations against local mock server'
+    )
+    parserBench.add_argument(
+        '--ops',
+        default='',
+        help='a comma separated list of operations to benchmark, all by default'
+    )
+    parserBench.add_argument(
+        '--jobs',
+        default='1000',
+        help='a comma separated list of numbers of jobs'
+    )
+    parserBench.add_argument(
+        '--latency',
+        default=0,
+        type=float,
+        help='latency of every request in milliseconds'
+    )
+    parserBench.add_argument(
+        '--bandwidth',
+        default=None,
+        type=float,
+        help='bandwidth of transfers in MB/s (default unlimited)'
+    )
+    parserBench.add_argument(
+        '--files',
+        default=1,
+        type=int,
+        help='number of result files per job'
+    )
+    parserBench.add_argument(
+        '--file-size',
+        default=1024,
+        type=int,
+        help='size of input and result files in bytes'
+    )
+    parserBench.add_argument(
+        '--archive',
+        action='store_true',
+        help='mock server sends results as tar archive'
+    )
+    parserBench.add_argument(
+        '--error-rate',
+        default=0,
+        type=float,
+        help='fraction of requests that mock server fails with 503'
+    )
+    parserBench.add_argument(
+        '--inline-size',
+        default=2 ** 16,
+        type=int,
+        help='largest input file that mock server accepts in POST of jobs (0 disables)'
+    )
+    parserBench.add_argument(
+        '--webdav',
+        action='store_true',
+        help='upload inputs to mock WebDAV instead of aCT'
+    )
+    parserBench.add_argument(
+        '--json',
+        default=None,
+        help='store results to given JSON file'
+    )
 
     return parser
 
 
 def runSubcommand(args):
+    # benchmarks run against local mock server and need no configuration
+    if args.command == 'bench':
+        subcommandBench(args)
+        return
+
     conf = loadConf(path=args.conf)
 
     # override values from configuration with command arguments if available
@@ -273,10 +483,21 @@ def subcommandClean(args, conf):
 
     actrest = getACTRestClient(args, conf)
     ids = getIDParam(args)
+    name, state = args.name, args.state
     try:
+        if args.plan:
+            ids = planJobAction(
+                args, conf, actrest, 'clean', state=args.state,
+                cleansWebDAV=lambda job: True, states=FINAL_STATES
+            )
+            if not ids:
+                return
+            name = state = ''
         disableSIGINT()
-        jobids = actrest.cleanJobs(jobids=ids, name=args.name, state=args.state)
+        jobids = list(actrest.iterCleanJobs(jobids=ids, name=name, state=state))
         print(f'Cleaned {len(jobids)} jobs')
+    except ACTClientError:
+        raise
     except Exception as exc:
         raise ACTClientError(f'Error cleaning jobs: {exc}')
     finally:
@@ -285,6 +506,72 @@ def subcommandClean(args, conf):
     webdavCleanup(args, conf, jobids)
 
 
+def planJobAction(args, conf, actrest, action, state='', cleansWebDAV=None, states=None, skipStates=()):
+    """
+    Print what the action would do and return IDs of jobs to act on.
+
+    Matching jobs are found with a status query of their states, which takes
+    one request per batch of IDs or, without IDs, one request per state.
+    Only jobs in states that the action affects are counted and returned:
+    the query is restricted to states if given and jobs in skipStates are
+    left out. Their counts per state and the size of WebDAV directories that
+    would be cleaned, taking one request per directory, are printed and the
+    user is asked for confirmation. An empty list is returned if there are
+    no jobs or the action is not confirmed.
+    """
+    ids = getIDParam(args)
+    if states:
+        if state:
+            selected = state if isinstance(state, list) else [state]
+            state = [st for st in selected if st in states]
+            if not state:
+                print(f'No jobs to {action}')
+                return []
+        else:
+            state = list(states)
+    try:
+        jobs = [
+            job for job in actrest.iterJobStats(
+                jobids=ids, name=args.name, state=state, clienttab=['id'], arctab=['id', 'arcstate']
+            )
+            if job['a_arcstate'] not in skipStates
+        ]
+    except Exception as exc:
+        raise ACTClientError(f'Error fetching jobs to {action}: {exc}')
+    if not jobs:
+        print(f'No jobs to {action}')
+        return []
+
+    print(f'Jobs to {action}: {len(jobs)}')
+    print()
+    counts = {}
+    for job in jobs:
+        counts[job['a_arcstate']] = counts.get(job['a_arcstate'], 0) + 1
+    printCounts('arcstate', counts)
+
+    webdavBase = getWebDAVBase(args, conf) if cleansWebDAV else None
+    if webdavBase:
+        dirids = [job['c_id'] for job in jobs if cleansWebDAV(job)]
+        webdavClient = getWebDAVClient(args, conf, webdavBase)
+        try:
+            size = sum(webdavClient.getDirSize(f'{webdavBase}/{jobid}') for jobid in dirids)
+        except Exception as exc:
+            raise ACTClientError(f'Error getting size of WebDAV directories: {exc}')
+        finally:
+            webdavClient.close()
+        print(f'WebDAV directories to clean: {len(dirids)} with {size / 2 ** 20:.1f} MB')
+        print()
+
+    try:
+        answer = input(f'{action.capitalize()} {len(jobs)} jobs? [y/N] ')
+    except EOFError:
+        answer = ''
+    if answer.strip().lower() not in ('y', 'yes'):
+        print('Cancelled')
+        return []
+    return [job['c_id'] for job in jobs]
+
+
 def webdavCleanup(args, conf, jobids, webdavClient=None, webdavBase=None):
     if not jobids:
         return
@@ -316,8 +603,16 @@ def subcommandFetch(args, conf):
 
     actrest = getACTRestClient(args, conf)
     ids = getIDParam(args)
+    name = args.name
     try:
-        jsonData = actrest.fetchJobs(jobids=ids, name=args.name)
+        if args.plan:
+            ids = planJobAction(args, conf, actrest, 'fetch', state='failed')
+            if not ids:
+                return
+            name = ''
+        jsonData = actrest.fetchJobs(jobids=ids, name=name)
+    except ACTClientError:
+        raise
     except Exception as exc:
         raise ACTClientError(f'Error fetching jobs: {exc}')
     finally:
@@ -331,62 +626,279 @@ def subcommandGet(args, conf):
 
     actrest = getACTRestClient(args, conf)
     ids = getIDParam(args)
-    toclean = []
+    progress = None
+    downloader = None
+    cleaner = None
     try:
-        jobs = actrest.getDownloadableJobs(jobids=ids, name=args.name, state=args.state)
-        for job in jobs:
-            try:
-                if args.use_jobname:
-                    dirname = job['c_jobname']
-                else:
-                    dirname = job['a_IDFromEndpoint']
-
-                # if ouput directory already exists add a number to its name
-                if os.path.isdir(dirname):
-                    dirnum = 1
-                    while os.path.isdir(f'{dirname}_{dirnum}'):
-                        dirnum += 1
-                        if dirnum > sys.maxsize:
-                            raise ACTClientError('Extraction directory already exists')
-                    dirname = f'{dirname}_{dirnum}'
-
-                anyResults, errors = actrest.downloadJobResults(job['c_id'], downloadDir=dirname)
-            except Exception as e:
-                print(f'Error downloading job {job["c_jobname"]}: {e}')
-                continue
-
-            if errors:
-                print(f'Errors downloading job {job["c_jobname"]}:')
-                for error in errors:
-                    print(f'    {error}')
-                continue
-            elif not anyResults:
-                print(f'No output files for job {job["c_jobname"]}')
-            else:
-                print(f'Results for job {job["c_jobname"]} stored in {dirname}')
-            toclean.append(job["c_id"])
+        states = getStates(args.state)
+        if args.watch:
+            jobs = None
+            progress = Progress()
+        else:
+            jobs = actrest.getDownloadableJobs(jobids=ids, name=args.name, state=states)
+            progress = Progress(total=len(jobs))
+        actrest.progress = progress
+        if (jobs or args.watch) and not args.noclean:
+            cleaner = JobCleaner(args, conf, progress)
+        downloader = JobDownloader(args, progress, args.manifest, cleaner)
+        if args.watch:
+            watchJobs(args, conf, actrest, downloader, ids=ids, states=states)
+        else:
+            for job in jobs:
+                downloader.download(actrest, job)
+    except ACTClientError:
+        raise
     except Exception as exc:
         raise ACTClientError(f'Error downloading jobs: {exc}')
     except KeyboardInterrupt:
-        print('Stopping job download ...')
+        if progress:
+            progress.print('Stopping job download ...')
+        else:
+            print('Stopping job download ...')
     finally:
-        if args.noclean:
-            return
-
-        disableSIGINT()
-
-        # reconnect in case KeyboardInterrupt left connection in a weird state
+        if progress:
+            progress.finish('Downloaded')
+        if downloader:
+            downloader.close()
         actrest.close()
 
-        if toclean:
+        # jobs that were downloaded before interrupt are still cleaned
+        if cleaner:
+            disableSIGINT()
+            cleaner.close()
+
+
+def watchJobs(args, conf, actrest, downloader, ids=None, states=''):
+    # Finished jobs are polled for in intervals and downloaded by a pool of
+    # workers with their own clients. Jobs that were already downloaded or
+    # failed in this run are skipped in following polls. Cleaned jobs are
+    # not returned anymore so polls stay small.
+    local = threading.local()
+    clients = []
+    clientsLock = threading.Lock()
+
+    def download(job):
+        if not hasattr(local, 'actrest'):
+            local.actrest = getACTRestClient(args, conf)
+            local.actrest.progress = downloader.progress
+            with clientsLock:
+                clients.append(local.actrest)
+        downloader.download(local.actrest, job)
+
+    seen = set()
+    pending = set()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(args.parallel, 1))
+    try:
+        while True:
+            nextPoll = time.monotonic() + args.interval
             try:
-                toclean = actrest.cleanJobs(jobids=toclean)
+                jobs = actrest.getDownloadableJobs(jobids=ids, name=args.name, state=states)
             except Exception as exc:
-                raise ACTClientError(f'Error cleaning up downloaded jobs: {exc}')
-            finally:
-                actrest.close()
+                downloader.progress.print(f'Error checking for finished jobs: {exc}')
+                jobs = []
+            for job in jobs:
+                if job['c_id'] not in seen:
+                    seen.add(job['c_id'])
+                    pending.add(executor.submit(download, job))
+
+            # handle finished downloads until next poll
+            while True:
+                timeout = nextPoll - time.monotonic()
+                if timeout <= 0:
+                    break
+                if not pending:
+                    time.sleep(timeout)
+                    break
+                done, pending = concurrent.futures.wait(
+                    pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    future.result()
+    finally:
+        # running downloads are finished so that their jobs are cleaned
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        for client in clients:
+            client.close()
+
+
+class JobDownloader:
+    """
+    Download results of jobs and record them in manifest and cleaner.
+
+    download() can be called from several threads with a client for each.
+    Manifest file is only opened when the first job is recorded.
+    """
+
+    def __init__(self, args, progress, manifestPath=None, cleaner=None):
+        self.args = args
+        self.progress = progress
+        self.manifestPath = manifestPath
+        self.manifest = None
+        self.cleaner = cleaner
+        self.dirs = DownloadDirs()
+        self.lock = threading.Lock()
+
+    def download(self, actrest, job):
+        progress = self.progress
+        try:
+            if self.args.use_jobname:
+                dirname = job['c_jobname']
+            else:
+                dirname = job['a_IDFromEndpoint']
+
+            # if ouput directory already exists add a number to its name
+            with self.lock:
+                dirname = self.dirs.allocate(dirname)
+
+            anyResults, errors = actrest.downloadJobResults(
+                job['c_id'],
+                downloadDir=dirname,
+                connections=self.args.connections,
+                archive=not self.args.no_archive,
+                include=self.args.include,
+                exclude=self.args.exclude
+            )
+        except Exception as e:
+            progress.print(f'Error downloading job {job["c_jobname"]}: {e}')
+            progress.addJobs(errors=1)
+            return
+
+        if errors:
+            with progress.lock:
+                progress.print(f'Errors downloading job {job["c_jobname"]}:')
+                for error in errors:
+                    progress.print(f'    {error}')
+            progress.addJobs(errors=1)
+            return
+        elif not anyResults:
+            progress.print(f'No output files for job {job["c_jobname"]}')
+        else:
+            progress.print(f'Results for job {job["c_jobname"]} stored in {dirname}')
+        if self.manifestPath:
+            self.record(job, dirname)
+        progress.addJobs()
+        if self.cleaner:
+            self.cleaner.add(job['c_id'])
+
+    def record(self, job, dirname):
+        with self.lock:
+            if self.manifest is None:
+                try:
+                    self.manifest = open(self.manifestPath, 'a')
+                except OSError as exc:
+                    raise ACTClientError(f'Error opening manifest {self.manifestPath}: {exc}')
+            self.manifest.write(json.dumps({'id': job['c_id'], 'name': job['c_jobname'], 'dir': dirname}) + '\n')
+            self.manifest.flush()
 
-            webdavCleanup(args, conf, toclean)
+    def close(self):
+        if self.manifest:
+            self.manifest.close()
+            self.manifest = None
+
+
+class DownloadDirs:
+    """
+    Allocate names of download directories that do not exist yet.
+
+    The directory is listed once and names are then allocated from the set
+    of taken names. The next number to try is remembered for every name so
+    that many jobs with the same name do not probe all previous numbers.
+    """
+
+    def __init__(self, path='.'):
+        try:
+            self.taken = set(os.listdir(path))
+        except OSError as exc:
+            raise ACTClientError(f'Error listing download directory {path}: {exc}')
+        self.counters = {}
+
+    def allocate(self, dirname):
+        if dirname not in self.taken:
+            self.taken.add(dirname)
+            return dirname
+        dirnum = self.counters.get(dirname, 1)
+        while f'{dirname}_{dirnum}' in self.taken:
+            dirnum += 1
+        self.counters[dirname] = dirnum + 1
+        dirname = f'{dirname}_{dirnum}'
+        self.taken.add(dirname)
+        return dirname
+
+
+class JobCleaner:
+    """
+    Clean downloaded jobs in aCT and WebDAV while other jobs are downloaded.
+
+    Jobs are cleaned by a background thread with its own clients. A batch is
+    cleaned when it is full or when its first job has waited for interval.
+    close() cleans the remaining jobs and waits for the thread.
+    """
+
+    def __init__(self, args, conf, progress, batchSize=CLEAN_BATCH_SIZE, interval=CLEAN_INTERVAL):
+        self.progress = progress
+        self.batchSize = batchSize
+        self.interval = interval
+        self.queue = queue.Queue()
+        self.cleaned = 0
+        self.failed = 0
+        self.webdavBase = getWebDAVBase(args, conf)
+        self.webdavClient = None
+        self.actrest = getACTRestClient(args, conf)
+        try:
+            if self.webdavBase:
+                self.webdavClient = getWebDAVClient(args, conf, self.webdavBase)
+        except Exception:
+            self.actrest.close()
+            raise
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def add(self, jobid):
+        self.queue.put(jobid)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.actrest.close()
+        if self.webdavClient:
+            self.webdavClient.close()
+        if self.cleaned:
+            self.progress.print(f'Cleaned {self.cleaned} downloaded jobs')
+        if self.failed:
+            raise ACTClientError(f'Error cleaning up {self.failed} downloaded jobs')
+
+    def _run(self):
+        done = False
+        while not done:
+            jobid = self.queue.get()
+            if jobid is None:
+                break
+            batch = [jobid]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batchSize:
+                try:
+                    jobid = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if jobid is None:
+                    done = True
+                    break
+                batch.append(jobid)
+            self._clean(batch)
+
+    def _clean(self, jobids):
+        try:
+            cleaned = self.actrest.cleanJobs(jobids=jobids)
+        except Exception as exc:
+            self.progress.print(f'Error cleaning up downloaded jobs: {exc}')
+            self.failed += len(jobids)
+            return
+        self.cleaned += len(cleaned)
+        if self.webdavClient:
+            for error in self.webdavClient.cleanJobDirs(self.webdavBase, cleaned):
+                self.progress.print(error)
 
 
 def subcommandKill(args, conf):
@@ -394,34 +906,66 @@ def subcommandKill(args, conf):
 
     actrest = getACTRestClient(args, conf)
     ids = getIDParam(args)
+    name, state = args.name, args.state
     try:
+        if args.plan:
+            ids = planJobAction(
+                args, conf, actrest, 'kill', state=args.state,
+                cleansWebDAV=isUnsubmitted, skipStates=FINAL_STATES
+            )
+            if not ids:
+                return
+            name = state = ''
         disableSIGINT()
-        jsonData = actrest.killJobs(jobids=ids, name=args.name, state=args.state)
+        numKilled = 0
+        tokill = []  # jobs whose WebDAV directories can be cleaned
+        for job in actrest.iterKillJobs(jobids=ids, name=name, state=state):
+            numKilled += 1
+            if isUnsubmitted(job):
+                tokill.append(job['c_id'])
+    except ACTClientError:
+        raise
     except Exception as exc:
         raise ACTClientError(f'Error killing jobs: {exc}')
     finally:
         actrest.close()
-    print(f'Will kill {len(jsonData)} jobs')
+    print(f'Will kill {numKilled} jobs')
 
     # clean in WebDAV
-    tokill = [job['c_id'] for job in jsonData if job['a_id'] is None or job['a_arcstate'] in ('tosubmit', 'submitting')]
     webdavCleanup(args, conf, tokill)
 
 
+def isUnsubmitted(job):
+    # jobs that are not submitted to ARC yet do not need their input files
+    return job['a_id'] is None or job['a_arcstate'] in ('tosubmit', 'submitting')
+
+
 def subcommandProxy(args, conf):
     checkConf(conf, ['server', 'token', 'proxy'])
 
-    actrest = getACTRestClient(args, conf, useToken=False)
     try:
         with open(conf['proxy'], 'r') as f:
             proxyStr = f.read()
     except FileNotFoundError:
         raise ACTClientError(f'Could not find proxy certificate in {conf["proxy"]}')
+
+    proxyInfo = getProxyInfo(proxyStr)
+    if proxyInfo['expires'] <= time.time():
+        raise ACTClientError(f'Proxy certificate {conf["proxy"]} has expired')
+    cache = loadCredCache(conf['credcache'])
+    if not args.force and os.path.isfile(conf['token']) and isDelegated(cache, conf['server'], proxyInfo):
+        expires = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(proxyInfo['expires']))
+        print(f'Proxy for {proxyInfo["dn"]} valid until {expires} is already delegated. Use --force to delegate again.')
+        return
+
+    actrest = getACTRestClient(args, conf, useToken=False)
     try:
         disableSIGINT()
+        clearCredCache(conf['credcache'])
         actrest.uploadProxy(proxyStr, conf['token'])
     finally:
         actrest.close()
+    storeCredCache(conf['credcache'], conf['server'], proxyInfo)
 
     print(f'Successfully inserted proxy. Access token stored in {conf["token"]}')
 
@@ -431,8 +975,16 @@ def subcommandResub(args, conf):
 
     actrest = getACTRestClient(args, conf)
     ids = getIDParam(args)
+    name = args.name
     try:
-        jsonData = actrest.resubmitJobs(jobids=ids, name=args.name)
+        if args.plan:
+            ids = planJobAction(args, conf, actrest, 'resubmit', state='failed')
+            if not ids:
+                return
+            name = ''
+        jsonData = actrest.resubmitJobs(jobids=ids, name=name)
+    except ACTClientError:
+        raise
     except Exception as exc:
         raise ACTClientError(f'Error resubmitting jobs: {exc}')
     finally:
@@ -448,6 +1000,8 @@ def subcommandStat(args, conf):
     try:
         if args.get_cols:
             getCols(actrest)
+        elif args.summary:
+            getSummary(args, actrest)
         else:
             getStats(args, actrest)
     finally:
@@ -467,16 +1021,43 @@ def getCols(actrest):
     print(f'{",".join(jsonData["client"])}')
 
 
+def getSummary(args, actrest):
+    ids = getIDParam(args)
+    try:
+        summary = actrest.getJobSummary(jobids=ids, name=args.name, state=getStates(args.state))
+    except Exception as exc:
+        raise ACTClientError(f'Error fetching job summary: {exc}')
+
+    for key, counts in summary.items():
+        if counts:
+            printCounts(key, counts)
+
+
+def printCounts(key, counts):
+    # empty and missing values are printed the same way as in job table
+    values = {}
+    for value, count in counts.items():
+        value = str(value) if value else "''"
+        values[value] = values.get(value, 0) + count
+    colsize = max(len(key), *(len(value) for value in values))
+    cntsize = max(len('count'), *(len(str(count)) for count in values.values()))
+    print(f'{key: <{colsize}} {"count": >{cntsize}}')
+    print('-' * (colsize + cntsize + 1))
+    for value, count in sorted(values.items(), key=lambda item: -item[1]):
+        print(f'{value: <{colsize}} {count: >{cntsize}}')
+    print()
+
+
 def getStats(args, actrest):
     ids = getIDParam(args)
     try:
-        jsonData = actrest.getJobStats(
+        jsonData = list(actrest.iterJobStats(
             jobids=ids,
             name=args.name,
-            state=args.state,
+            state=getStates(args.state),
             clienttab=args.client.split(','),
             arctab=args.arc.split(',')
-        )
+        ))
     except Exception as exc:
         raise ACTClientError(f'Error fetching job status: {exc}')
 
@@ -538,29 +1119,55 @@ def getStats(args, actrest):
 def subcommandSub(args, conf):
     checkConf(conf, ['server', 'token'])
 
-    if 'clusters' in conf:
-        if args.clusterlist in conf['clusters']:
-            clusterlist = conf['clusters'][args.clusterlist]
+    journal = SubmissionJournal(args.journal) if args.journal else None
+    if args.resume:
+        if not journal:
+            raise ACTClientError('Journal of submission to resume has to be given with --journal')
+        if args.xRSL:
+            raise ACTClientError('Job descriptions are taken from journal when resuming submission')
+        journal.resume()
+        descs = journal.getUnfinishedDescs()
+        clusterlist = journal.clusterlist
+        webdavBase = journal.webdavBase
+        print(f'Resuming submission of {len(descs)} of {len(journal.descs)} job descriptions')
+    else:
+        if not args.xRSL:
+            raise ACTClientError('No job descriptions given')
+        if 'clusters' in conf:
+            if args.clusterlist in conf['clusters']:
+                clusterlist = conf['clusters'][args.clusterlist]
+            else:
+                clusterlist = args.clusterlist.split(',')
         else:
             clusterlist = args.clusterlist.split(',')
-    else:
-        clusterlist = args.clusterlist.split(',')
+        descs = args.xRSL
+        webdavBase = getWebDAVBase(args, conf) if args.webdav else None
 
     actrest = getACTRestClient(args, conf)
+    if journal and not args.resume:
+        try:
+            journal.start(descs, clusterlist, webdavBase)
+        except ACTClientError:
+            actrest.close()
+            raise
+    progress = Progress()
+    actrest.progress = progress
     webdavClient = None
-    webdavBase = None
     jobs = []
+    finished = False
     try:
-        if args.webdav:
-            webdavBase = getWebDAVBase(args, conf)
+        if webdavBase:
             webdavClient = getWebDAVClient(args, conf, webdavBase)
-        jobs = actrest.submitJobs(args.xRSL, clusterlist, webdavClient, webdavBase)
+            webdavClient.progress = progress
+        jobs = actrest.submitJobs(descs, clusterlist, webdavClient, webdavBase, journal)
+        finished = True
     except SubmissionInterrupt as exc:
         jobs = exc.results
     except Exception as exc:
         raise ACTClientError(f'Error submitting jobs: {exc}')
     finally:
         disableSIGINT()
+        progress.finish('Submitted')
 
         # reconnect in case KeyboardInterrupt left connection in a weird state
         actrest.close()
@@ -577,16 +1184,23 @@ def subcommandSub(args, conf):
             elif not job['cleanup']:
                 print(f'Inserted job {job["name"]} with ID {job["id"]}')
 
-        # cleanup failed jobs
+        # cleanup failed jobs, journal is kept if anything is left to do
+        cleaned = False
         try:
-            submitCleanup(args, conf, actrest, jobs, webdavClient, webdavBase)
+            submitCleanup(args, conf, actrest, jobs, webdavClient, webdavBase, journal)
+            cleaned = True
         finally:
             actrest.close()
             if webdavClient:
                 webdavClient.close()
+            if journal and finished and cleaned:
+                journal.remove()
+            elif journal:
+                journal.close()
+                print(f'Submission can be continued with act sub --resume --journal {args.journal}')
 
 
-def submitCleanup(args, conf, actrest, jobs, webdavClient, webdavBase):
+def submitCleanup(args, conf, actrest, jobs, webdavClient, webdavBase, journal=None):
     # clean jobs that could not be submitted
     tokill = [job['id'] for job in jobs if job['cleanup']]
     if tokill:
@@ -595,6 +1209,10 @@ def submitCleanup(args, conf, actrest, jobs, webdavClient, webdavBase):
             jobs = actrest.killJobs(jobids=tokill)
         except Exception as exc:
             raise ACTClientError(f'Error cleaning up after job submission: {exc}')
+        if journal:
+            for jobid in tokill:
+                journal.record('killed', id=jobid)
+            journal.sync()
         toclean = [job['c_id'] for job in jobs]
         webdavCleanup(args, conf, toclean, webdavClient, webdavBase)
 
@@ -607,6 +1225,14 @@ def subcommandCat(args, conf):
     else:
         infoKey = "StdOut"
 
+    byteRange = None
+    if args.bytes:
+        byteRange = getByteRange(args.bytes)
+    if args.tail is not None and args.tail < 1:
+        raise ACTClientError('Number of lines for --tail has to be positive')
+    if args.follow and byteRange:
+        raise ACTClientError('--follow cannot be used with --bytes')
+
     actrest = getACTRestClient(args, conf)
     ids = getIDParam(args)
     try:
@@ -615,7 +1241,7 @@ def subcommandCat(args, conf):
             jsonData = actrest.getJobStats(
                 jobids=ids,
                 name=args.name,
-                state=args.state,
+                state=getStates(args.state),
                 clienttab=['id', 'jobname'],
                 arctab=['IDFromEndpoint', 'cluster', infoKey]
             )
@@ -625,53 +1251,320 @@ def subcommandCat(args, conf):
         if not jsonData:
             return
 
-        # per cluster ARCRest; maybe there could be connect method on clients
-        # to allow reconnection to another host?
-        clients = {}
-
+        jobs = []
         for job in jsonData:
             # skip if required path not in DB yet
             if f'a_{infoKey}' not in job or job[f'a_{infoKey}'] is None:
                 print(f"{infoKey.lower()} not yet available for job {job['c_id']} {job['c_jobname']}")
                 continue
+            jobs.append(job)
 
-            # create a client for the cluster if it does not exist
-            if job['a_cluster'] not in clients:
-                try:
-                    httpClient = HTTPClient(url=job['a_cluster'], proxypath=conf['proxy'], logger=actrest.logger)
-                except Exception as exc:
-                    print(f'Error creating REST client for ARC cluster {job["a_cluster"]} for job {job["c_id"]} {job["c_jobname"]}: {exc}')
-                    continue
-                clients[job['a_cluster']] = httpClient
+        fetcher = ARCSessionFetcher(
+            conf['proxy'], logger=actrest.logger, connections=args.connections, tracer=actrest.tracer, retry=actrest.retry
+        )
+        workers = args.connections * len({job['a_cluster'] for job in jobs})
+        try:
+            if args.follow:
+                catFollow(fetcher, jobs, infoKey, workers, args.interval, args.tail)
+            elif args.interleave:
+                catInterleaved(fetcher, jobs, infoKey, workers, args.tail, byteRange)
             else:
-                httpClient = clients[job['a_cluster']]
+                catOrdered(fetcher, jobs, infoKey, workers, args.tail, byteRange)
+        finally:
+            fetcher.close()
+
+    finally:
+        actrest.close()
+
+
+def catOrdered(fetcher, jobs, infoKey, workers, tail=None, byteRange=None):
+    # Output of the current job is printed as it arrives while outputs of
+    # following jobs are prefetched to memory up to a shared byte limit.
+    limit = PrefetchLimit(CAT_PREFETCH_SIZE)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1))
+    pipes = []
+    futures = []
+    try:
+        for job in jobs:
+            pipe = OutputPipe(limit)
+            futures.append(executor.submit(fetchToPipe, fetcher, job, infoKey, pipe, tail, byteRange))
+            pipes.append((job, pipe))
 
-            # initiate file download
-            url = f'/arex/rest/1.0/jobs/{job["a_IDFromEndpoint"]}/session/{job["a_"+infoKey]}'
+        for job, pipe in pipes:
+            sys.stdout.flush()
             try:
-                resp = httpClient.request('GET', url)
+                for chunk in pipe:
+                    sys.stdout.buffer.write(chunk)
             except Exception as exc:
-                print(f'Error fetching {infoKey.lower()} from {url} for job {job["c_id"]} {job["c_jobname"]}: {exc}')
-                continue
-            if resp.status != 200:
-                text = resp.read().decode()
-                httpClient.logger.debug(f"Response for {url} - {resp.status} {text}")
-                try:
-                    msg = (json.loads(text))['msg']
-                    print(f'Error fetching {infoKey.lower()} from {url} for job {job["c_id"]} {job["c_jobname"]}: {msg}')
-                except json.JSONDecodeError:
-                    print(f'Error parsing JSON response from {url} for job {job["c_id"]} {job["c_jobname"]} - {resp.status} {text}')
-                continue
+                sys.stdout.buffer.flush()
+                print(f'Error fetching {infoKey.lower()} for job {job["c_id"]} {job["c_jobname"]}: {exc}')
+            else:
+                sys.stdout.buffer.flush()
+    finally:
+        limit.close()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
 
-            # stream file to stdout
+def fetchToPipe(fetcher, job, infoKey, pipe, tail=None, byteRange=None):
+    try:
+        fetchJobOutput(fetcher, job, infoKey, pipe, tail, byteRange)
+    except BaseException as exc:
+        pipe.finish(exc)
+    else:
+        pipe.finish()
+
+
+class PrefetchLimit:
+    """Number of bytes buffered in all OutputPipes and its limit."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.size = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class OutputPipe:
+    """
+    Output of job passed from the thread that fetches it to the printing one.
+
+    Writes wait while the shared limit is reached unless the pipe is being
+    printed. One chunk is always accepted so that a chunk bigger than the
+    limit does not block forever.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.chunks = collections.deque()
+        self.printed = False
+        self.done = False
+        self.error = None
+
+    def write(self, data):
+        limit = self.limit
+        with limit.cond:
+            while (not self.printed and not limit.closed and limit.size
+                   and limit.size + len(data) > limit.limit):
+                limit.cond.wait()
+            if limit.closed:
+                raise ACTClientError('Output is not printed anymore')
+            self.chunks.append(bytes(data))
+            limit.size += len(data)
+            limit.cond.notify_all()
+        return len(data)
+
+    def finish(self, error=None):
+        with self.limit.cond:
+            self.done = True
+            self.error = error
+            self.limit.cond.notify_all()
+
+    def __iter__(self):
+        limit = self.limit
+        with limit.cond:
+            self.printed = True
+            limit.cond.notify_all()
+        while True:
+            with limit.cond:
+                while not self.chunks and not self.done:
+                    limit.cond.wait()
+                if not self.chunks:
+                    if self.error:
+                        raise self.error
+                    return
+                chunk = self.chunks.popleft()
+                limit.size -= len(chunk)
+                limit.cond.notify_all()
+            yield chunk
+
+
+def fetchJobOutput(fetcher, job, infoKey, out, tail=None, byteRange=None):
+    """
+    Write job's output to file object and return file size if known.
+
+    The size is always known with tail.
+    """
+    args = (job['a_cluster'], job['a_IDFromEndpoint'], job[f'a_{infoKey}'])
+    if not tail:
+        return fetcher.fetch(*args, out, byteRange=byteRange)
+
+    # Fetch increasingly bigger suffix of the file until it has enough lines.
+    # One line more is needed because the first one might be partial.
+    size = TAIL_BYTES
+    while True:
+        buf = io.BytesIO()
+        total = fetcher.fetch(*args, buf, byteRange=(None, size))
+        data = buf.getvalue()
+        if total is None:
+            # size is needed as offset for following so the whole file is
+            # fetched if server does not send it with suffix
+            buf = io.BytesIO()
+            fetcher.fetch(*args, buf)
+            data = buf.getvalue()
+            total = len(data)
+            break
+        if len(data.splitlines()) > tail or len(data) >= total:
+            break
+        size *= 4
+    out.write(b''.join(data.splitlines(keepends=True)[-tail:]))
+    return total
+
+
+def catInterleaved(fetcher, jobs, infoKey, workers, tail=None, byteRange=None):
+    lock = threading.Lock()
+
+    def fetchJob(job):
+        writer = PrefixedLineWriter(sys.stdout.buffer, f'[{job["c_id"]} {job["c_jobname"]}] ', lock)
+        fetchJobOutput(fetcher, job, infoKey, writer, tail, byteRange)
+        writer.close()
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1))
+    futures = {executor.submit(fetchJob, job): job for job in jobs}
+    try:
+        for future in concurrent.futures.as_completed(futures):
+            job = futures[future]
             try:
-                data = resp.read(HTTP_BUFFER_SIZE)
-                while data:
-                    print(data.decode(), end='')
-                    data = resp.read(HTTP_BUFFER_SIZE)
+                future.result()
             except Exception as exc:
-                print(f'Error fetching {infoKey.lower()} from {url} for job {job["c_id"]} {job["c_jobname"]}: {exc}')
-                continue
+                with lock:
+                    print(f'Error fetching {infoKey.lower()} for job {job["c_id"]} {job["c_jobname"]}: {exc}', flush=True)
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def catFollow(fetcher, jobs, infoKey, workers, interval, tail=None):
+    # Offset of the next unseen byte is kept for every job and only the
+    # bytes after it are fetched in every round. Writers are kept between
+    # rounds so that partial lines are completed by the following bytes.
+    lock = threading.Lock()
+    writers = {}
+    offsets = {}
+    for job in jobs:
+        prefix = f'[{job["c_id"]} {job["c_jobname"]}] ' if len(jobs) > 1 else ''
+        writers[job['c_id']] = PrefixedLineWriter(sys.stdout.buffer, prefix, lock)
+
+    def fetchNew(job):
+        writer = writers[job['c_id']]
+        written = writer.written
+        if job['c_id'] not in offsets:
+            size = fetchJobOutput(fetcher, job, infoKey, writer, tail)
+            if tail:
+                offsets[job['c_id']] = size
+            else:
+                offsets[job['c_id']] = writer.written - written
+        else:
+            args = (job['a_cluster'], job['a_IDFromEndpoint'], job[f'a_{infoKey}'])
+            fetcher.fetch(*args, writer, byteRange=(offsets[job['c_id']], None))
+            offsets[job['c_id']] += writer.written - written
 
+    jobs = list(jobs)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1))
+    try:
+        while True:
+            futures = {executor.submit(fetchNew, job): job for job in jobs}
+            for future in concurrent.futures.as_completed(futures):
+                job = futures[future]
+                try:
+                    future.result()
+                except Exception as exc:
+                    with lock:
+                        print(f'Stopped following {infoKey.lower()} for job {job["c_id"]} {job["c_jobname"]}: {exc}', flush=True)
+                    jobs.remove(job)
+            if not jobs:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
     finally:
-        actrest.close()
+        executor.shutdown(wait=False)
+        for writer in writers.values():
+            writer.close()
+
+
+class PrefixedLineWriter:
+    """Write complete lines with prefix to a shared binary stream."""
+
+    def __init__(self, out, prefix, lock):
+        self.out = out
+        self.prefix = prefix.encode()
+        self.lock = lock
+        self.partial = b''
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+        lines = (self.partial + bytes(data)).split(b'\n')
+        self.partial = lines.pop()
+        if lines:
+            self._writeLines(lines)
+        return len(data)
+
+    def close(self):
+        if self.partial:
+            self._writeLines([self.partial])
+            self.partial = b''
+
+    def _writeLines(self, lines):
+        text = b''.join(self.prefix + line + b'\n' for line in lines)
+        with self.lock:
+            sys.stdout.flush()
+            self.out.write(text)
+            self.out.flush()
+
+
+def subcommandBench(args):
+    # benchmark and mock server are not needed by other commands
+    from act_client.bench import OPERATIONS, runBenchmark
+
+    ops = args.ops.split(',') if args.ops else OPERATIONS
+    for op in ops:
+        if op not in OPERATIONS:
+            raise ACTClientError(f'Unknown benchmark operation {op}')
+    try:
+        sizes = [int(size) for size in args.jobs.split(',')]
+    except ValueError:
+        raise ACTClientError(f'Invalid list of numbers of jobs: {args.jobs}')
+    bandwidth = args.bandwidth * 2 ** 20 if args.bandwidth else None
+
+    print(
+        f'{"op": <6} {"jobs": >7} {"seconds": >8} {"jobs/s": >9} {"requests": >8} {"MB in": >8} {"MB out": >8} '
+        f'{"MB/s": >7} {"CPU s": >7} {"MB out/CPU s": >12}'
+    )
+    results = []
+    for size in sizes:
+        for op in ops:
+            result = runBenchmark(
+                op,
+                size,
+                webdav=args.webdav,
+                latency=args.latency / 1000,
+                bandwidth=bandwidth,
+                files=args.files,
+                fileSize=args.file_size,
+                archive=args.archive,
+                errorRate=args.error_rate,
+                inlineFileSize=args.inline_size,
+            )
+            results.append(result)
+            print(
+                f'{op: <6} {size: >7} {result["seconds"]: >8.2f} {result["jobsPerSecond"]: >9.1f} '
+                f'{result["requests"]: >8} {result["bytesIn"] / 2 ** 20: >8.2f} '
+                f'{result["bytesOut"] / 2 ** 20: >8.2f} {result["MBPerSecond"]: >7.2f} '
+                f'{result["cpuSeconds"]: >7.2f} {result["MBOutPerCPUSecond"] or 0: >12.1f}'
+            )
+
+    if args.json:
+        try:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+        except OSError as exc:
+            raise ACTClientError(f'Error storing benchmark results to {args.json}: {exc}')
@@ -0,0 +1,55 @@
+"""
+JSON encoding and decoding with a selectable backend.
+
+By default the fastest installed backend is used: orjson, then ujson and
+finally the json module from standard library. All backends encode to bytes
+and raise ValueError (or its subclass) on invalid input.
+"""
+
+import importlib
+
+from act_client.common import ACTClientError
+
+BACKENDS = ('orjson', 'ujson', 'json')
+
+
+class JSONCodec:
+
+    def __init__(self, backend=None):
+        if backend is None:
+            backends = BACKENDS
+        elif backend in BACKENDS:
+            backends = (backend,)
+        else:
+            raise ACTClientError(f'Unknown JSON backend {backend}')
+
+        for name in backends:
+            try:
+                self.module = importlib.import_module(name)
+            except ImportError:
+                continue
+            self.name = name
+            break
+        else:
+            raise ACTClientError(f'JSON backend {backend} is not installed')
+
+    def dumps(self, obj):
+        if self.name == 'orjson':
+            return self.module.dumps(obj)
+        return self.module.dumps(obj).encode()
+
+    def loads(self, data):
+        if self.name == 'json' and isinstance(data, (bytes, bytearray)):
+            data = data.decode()
+        return self.module.loads(data)
+
+
+def getAvailableBackends():
+    backends = []
+    for name in BACKENDS:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        backends.append(name)
+    return backends
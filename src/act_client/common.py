@@ -1,9 +1,45 @@
 import os
 import signal
+import threading
 
 
 # TODO: HARDCODED
 HTTP_BUFFER_SIZE = 2 ** 23  # 8MB
+JSON_BUFFER_SIZE = 2 ** 16  # 64KB
+
+# files of at least this size are downloaded over several connections
+RANGE_DOWNLOAD_SIZE = 2 ** 30  # 1GB
+DOWNLOAD_CONNECTIONS = 4
+
+# initial size of file suffix that is fetched for act cat --tail
+TAIL_BYTES = 2 ** 16  # 64KB
+
+# outputs of following jobs are prefetched by act cat up to this size
+CAT_PREFETCH_SIZE = 2 ** 25  # 32MB
+
+# input files of at most this size are sent with POST of jobs if server
+# accepts them, up to total size per batch of jobs
+INLINE_FILE_SIZE = 2 ** 16  # 64KB
+INLINE_BATCH_SIZE = 2 ** 23  # 8MB
+
+# downloaded jobs are cleaned in batches of this size while other jobs are
+# downloaded, a partial batch is cleaned after waiting for interval in seconds
+CLEAN_BATCH_SIZE = 100
+CLEAN_INTERVAL = 5
+
+# states of jobs that are finished in ARC, jobs in these states are cleaned
+# and cannot be killed
+FINAL_STATES = ('done', 'donefailed', 'failed', 'cancelled')
+
+# retries of failed requests with exponential backoff in seconds
+RETRIES = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30
+
+# consecutive failed requests to host after which requests to it fail fast
+# for cooldown period in seconds
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30
 
 
 def getIDParam(args):
@@ -49,6 +85,70 @@ def getIDsFromStr(listStr):
     return ids
 
 
+def getStates(stateStr):
+    # a single state is returned as is and several as a list
+    states = [state for state in stateStr.split(',') if state]
+    if len(states) > 1:
+        return states
+    return states[0] if states else ''
+
+
+def getIDRanges(ids):
+    """
+    Return a list of ID groups in the format parsed by getIDsFromStr.
+
+    Consecutive IDs are joined to ranges so that requests for big sets of
+    jobs are short, e.g. [1, 2, 3, 5] becomes ['1-3', '5'].
+    """
+    groups = []
+    ids = sorted(set(ids))
+    start = 0
+    for i in range(1, len(ids) + 1):
+        if i == len(ids) or ids[i] != ids[i - 1] + 1:
+            if i - 1 > start:
+                groups.append(f'{ids[start]}-{ids[i - 1]}')
+            else:
+                groups.append(str(ids[start]))
+            start = i
+    return groups
+
+
+def getByteRange(rangeStr):
+    """
+    Return a tuple of first and last byte from "start-end" string.
+
+    Either can be omitted: "start-" is an open range and "-N" are the last
+    N bytes which is returned as (None, N).
+    """
+    try:
+        start, end = rangeStr.split('-')
+    except ValueError:
+        raise ACTClientError(f'Invalid byte range: {rangeStr}')
+    try:
+        start = int(start) if start else None
+        end = int(end) if end else None
+    except ValueError:
+        raise ACTClientError(f'Invalid byte range: {rangeStr}')
+    if start is None and end is None:
+        raise ACTClientError(f'Invalid byte range: {rangeStr}')
+    if start is not None and end is not None and end < start:
+        raise ACTClientError(f'Invalid byte range end: {rangeStr}')
+    return start, end
+
+
+# Every thread reuses its own transfer buffer instead of allocating a new
+# chunk on every read.
+_transferBuffers = threading.local()
+
+
+def getTransferBuffer(size):
+    buf = getattr(_transferBuffers, 'buf', None)
+    if buf is None or len(buf) < size:
+        buf = memoryview(bytearray(size))
+        _transferBuffers.buf = buf
+    return buf[:size]
+
+
 def deleteFile(filename):
     try:
         if os.path.isfile(filename):
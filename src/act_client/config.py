@@ -17,8 +17,8 @@ import yaml
 from act_client.common import ACTClientError
 
 # program parameters that are paths have to be expanded (env vars, tilda)
-PATH_KEYS = ('proxy', 'token', )
-DEFAULT_KEYS = ('proxy', 'token', )
+PATH_KEYS = ('proxy', 'token', 'credcache', )
+DEFAULT_KEYS = ('proxy', 'token', 'credcache', )
 
 # construct default paths for config and token files
 DIRNAME = 'act-client' # name of directories for configuration and data
@@ -26,6 +26,7 @@ CONF_HOME = os.path.expandvars('$XDG_CONFIG_HOME')
 DATA_HOME = os.path.expandvars('$XDG_DATA_HOME')
 CONF_NAME = 'config.yaml'
 TOKEN_NAME = 'token'
+CREDCACHE_NAME = 'credentials.json'
 
 # XDG Base Directory specification use
 if CONF_HOME == '$XDG_CONFIG_HOME':
@@ -42,6 +43,7 @@ else:
 DEFAULT_CONF = {
     'proxy': f'/tmp/x509up_u{os.getuid()}',
     'token': os.path.join(DATA_BASE, TOKEN_NAME),
+    'credcache': os.path.join(DATA_BASE, CREDCACHE_NAME),
 }
 
 # default configuration path is not addressed by key and not needed from outside
@@ -0,0 +1,80 @@
+"""
+Local cache of metadata about delegated proxy and access token.
+
+After successful delegation, DN, fingerprint and expiry time of the proxy
+are stored along with the server URL. Access token has the same lifetime as
+the proxy so commands can check its validity without contacting the server
+and act proxy can skip delegation of a proxy that is already delegated.
+"""
+
+import calendar
+import json
+import os
+import time
+
+from cryptography.hazmat.primitives import hashes
+from pyarcrest.x509 import parsePEM
+
+from act_client.common import ACTClientError
+
+
+def getProxyInfo(proxyStr):
+    try:
+        cert, _, _ = parsePEM(proxyStr)
+    except Exception as exc:
+        raise ACTClientError(f'Error parsing proxy certificate: {exc}')
+    try:
+        expires = cert.not_valid_after_utc.timestamp()
+    except AttributeError:  # older cryptography returns naive UTC datetime
+        expires = calendar.timegm(cert.not_valid_after.utctimetuple())
+    return {
+        'dn': cert.subject.rfc4514_string(),
+        'fingerprint': cert.fingerprint(hashes.SHA256()).hex(),
+        'expires': expires,
+    }
+
+
+def loadCredCache(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):  # missing or corrupted cache is ignored
+        return {}
+
+
+def storeCredCache(path, server, proxyInfo):
+    cache = dict(proxyInfo)
+    cache['server'] = server
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(cache, f)
+        os.chmod(path, 0o600)
+    except OSError as exc:
+        raise ACTClientError(f'Error storing credential cache {path}: {exc}')
+
+
+def clearCredCache(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as exc:
+        raise ACTClientError(f'Error removing credential cache {path}: {exc}')
+
+
+def isDelegated(cache, server, proxyInfo):
+    """Return True if the same proxy is delegated to server and not expired."""
+    return (
+        cache.get('server') == server
+        and cache.get('fingerprint') == proxyInfo['fingerprint']
+        and cache.get('expires', 0) > time.time()
+    )
+
+
+def checkTokenExpiry(cache, server):
+    if cache.get('server') != server or 'expires' not in cache:
+        return
+    if cache['expires'] <= time.time():
+        expired = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(cache['expires']))
+        raise ACTClientError(f'Access token for {cache.get("dn")} expired at {expired}. Run act proxy.')
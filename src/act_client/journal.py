@@ -0,0 +1,147 @@
+"""
+Journal of job submission that allows interrupted submission to continue.
+
+Progress of every job is appended to a JSON lines file as it happens:
+
+    {"event": "start", "descs": [...], "clusterlist": [...], "webdav": ...}
+    {"event": "parsed", "desc": path, "jobs": number of jobs in description}
+    {"event": "posted", "desc": path, "index": job in description, "id": ID}
+    {"event": "uploaded", "id": ID, "file": name}
+    {"event": "submitted", "id": ID, "name": name}
+    {"event": "killed", "id": ID}
+
+Lines are flushed when written so they survive the process being killed and
+the file is synced to disk when jobs are created and after every batch. When
+the submission is resumed, jobs that were created but not submitted are
+continued with only missing files uploaded. Jobs that were never created or
+were killed during cleanup are submitted again. The journal is removed when
+all descriptions are processed.
+"""
+
+import json
+import os
+
+from act_client.common import ACTClientError
+
+
+class SubmissionJournal:
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.descs = []
+        self.clusterlist = []
+        self.webdavBase = None
+        self.parsed = {}  # number of jobs per description
+        self.jobs = {}  # job states by (description, index)
+        self.ids = {}  # job states by ID
+
+    def start(self, descs, clusterlist, webdavBase):
+        self.descs = [os.path.abspath(desc) for desc in descs]
+        self.clusterlist = clusterlist
+        self.webdavBase = webdavBase
+        try:
+            self.file = open(self.path, 'x')
+        except FileExistsError:
+            raise ACTClientError(
+                f'Journal {self.path} of unfinished submission exists. '
+                'Continue it with act sub --resume or remove the file.'
+            )
+        except OSError as exc:
+            raise ACTClientError(f'Error creating journal {self.path}: {exc}')
+        self._write({'event': 'start', 'descs': self.descs, 'clusterlist': clusterlist, 'webdav': webdavBase})
+        self.sync()
+
+    def resume(self):
+        try:
+            with open(self.path, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            raise ACTClientError(f'No journal {self.path} of unfinished submission')
+        except OSError as exc:
+            raise ACTClientError(f'Error reading journal {self.path}: {exc}')
+
+        for num, line in enumerate(lines, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if num == len(lines):  # last line can be cut by crash
+                    break
+                raise ACTClientError(f'Invalid line {num} in journal {self.path}')
+            self._apply(record)
+        if not self.descs:
+            raise ACTClientError(f'Journal {self.path} has no start record')
+
+        try:
+            self.file = open(self.path, 'a')
+        except OSError as exc:
+            raise ACTClientError(f'Error opening journal {self.path}: {exc}')
+        # the cut line is terminated so that the next record is valid
+        if lines and not lines[-1].endswith('\n'):
+            self.file.write('\n')
+
+    def _apply(self, record):
+        event = record['event']
+        if event == 'start':
+            self.descs = record['descs']
+            self.clusterlist = record['clusterlist']
+            self.webdavBase = record['webdav']
+        elif event == 'parsed':
+            self.parsed[record['desc']] = record['jobs']
+        elif event == 'posted':
+            job = {'id': record['id'], 'uploaded': set(), 'submitted': False, 'killed': False}
+            self.jobs[(record['desc'], record['index'])] = job
+            self.ids[record['id']] = job
+        elif record['id'] in self.ids:
+            job = self.ids[record['id']]
+            if event == 'uploaded':
+                job['uploaded'].add(record['file'])
+            elif event == 'submitted':
+                job['submitted'] = True
+                job['name'] = record['name']
+            elif event == 'killed':
+                job['killed'] = True
+
+    def _write(self, record):
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+    def record(self, event, **fields):
+        record = {'event': event, **fields}
+        if 'desc' in record:
+            record['desc'] = os.path.abspath(record['desc'])
+        self._write(record)
+        self._apply(record)
+
+    def sync(self):
+        os.fsync(self.file.fileno())
+
+    def getJob(self, desc, index):
+        """Return state of job that is still alive on server or None."""
+        job = self.jobs.get((os.path.abspath(desc), index))
+        if job is None or job['killed']:
+            return None
+        return job
+
+    def getUnfinishedDescs(self):
+        descs = []
+        for desc in self.descs:
+            numJobs = self.parsed.get(desc)
+            if numJobs is None or not all(
+                (desc, index) in self.jobs and self.jobs[(desc, index)]['submitted']
+                for index in range(numJobs)
+            ):
+                descs.append(desc)
+        return descs
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError as exc:
+            raise ACTClientError(f'Error removing journal {self.path}: {exc}')
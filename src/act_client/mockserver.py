@@ -0,0 +1,462 @@
+"""
+Local stand-in for aCT REST, ARC session and WebDAV endpoints.
+
+The server is meant for benchmarks and offline testing of the client. It
+keeps jobs in memory and implements the endpoints that the client uses:
+
+    /jobs (GET, POST, PUT, PATCH, DELETE)
+    /jobs/{id}/data/{name} (PUT)
+    /jobs/{id}/results/... (GET listing, file or tar archive)
+    /proxies (POST, PUT, DELETE)
+    /info (GET)
+    /arex/rest/1.0/jobs/{arcid}/session/{name} (GET)
+    /webdav/... (MKCOL, PUT with 307 redirect, PROPFIND, DELETE)
+
+Every response is delayed by configurable latency and bodies are sent and
+received at configurable bandwidth. A configurable fraction of requests that
+the client can retry is answered with 503. Small input files are accepted in
+POST of jobs and their size limit is advertised in /info. Plain HTTP is used
+so no certificates are needed.
+
+# Sample usage:
+server = MockServer(latency=0.01, bandwidth=100 * 2 ** 20)
+server.start()
+server.addJobs(1000)
+actrest = ACTRest(server.url, token='token')
+"""
+
+import base64
+import http.server
+import io
+import json
+import random
+import re
+import socketserver
+import sys
+import tarfile
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from act_client.common import getIDsFromStr
+
+ARC_COLUMNS = ('id', 'JobID', 'State', 'arcstate', 'cluster', 'IDFromEndpoint', 'StdOut', 'StdErr')
+CLIENT_COLUMNS = ('id', 'jobname', 'modified', 'created')
+DEFAULT_CLUSTER = 'https://arc.example.org/cpu'
+
+# requests that can be repeated and therefore fail with configured error rate,
+# job creation with POST is never failed so that benchmarks finish
+FAILING_METHODS = ('GET', 'HEAD', 'PROPFIND', 'PUT', 'PATCH', 'DELETE')
+
+SEND_CHUNK_SIZE = 2 ** 16  # 64KB
+
+
+class MockServer:
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0, bandwidth=None,
+                 files=1, fileSize=1024, outputSize=1024, archive=False, errorRate=0,
+                 inlineFileSize=2 ** 16):
+        self.latency = latency
+        self.bandwidth = bandwidth  # bytes per second, None for unlimited
+        self.files = files  # number of result files per job
+        self.fileSize = fileSize
+        self.outputSize = outputSize  # size of stdout in session directory
+        self.archive = archive  # whether results can be sent as tar
+        self.errorRate = errorRate  # fraction of requests that fail with 503
+        self.inlineFileSize = inlineFileSize  # input files accepted in POST, 0 for none
+        self.random = random.Random(0)  # same failures in every run
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.nextID = 1
+        self.webdav = {}  # uploaded WebDAV files, path -> size
+        self.uploads = {}  # uploaded job data, (id, name) -> size
+        self.httpd = MockHTTPServer((host, port), MockHandler)
+        self.httpd.mock = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def addJob(self, clusterlist=None, arcstate='done'):
+        with self.lock:
+            jobid = self.nextID
+            self.nextID += 1
+            cluster = clusterlist[0] if clusterlist else DEFAULT_CLUSTER
+            self.jobs[jobid] = {
+                'c_id': jobid,
+                'c_jobname': f'job{jobid}',
+                'c_modified': None,
+                'c_created': None,
+                'a_id': jobid,
+                'a_JobID': f'{cluster}/arex/mock{jobid}',
+                'a_State': 'Finished' if arcstate == 'done' else '',
+                'a_arcstate': arcstate,
+                'a_cluster': cluster,
+                'a_IDFromEndpoint': f'mock{jobid}',
+                'a_StdOut': 'stdout.txt',
+                'a_StdErr': 'stderr.txt',
+            }
+        return jobid
+
+    def addJobs(self, num, **kwargs):
+        return [self.addJob(**kwargs) for _ in range(num)]
+
+    def filterJobs(self, query):
+        ids = query.get('id')
+        if ids:
+            ids = getIDsFromStr(ids)
+            jobs = [self.jobs[jobid] for jobid in ids if jobid in self.jobs]
+        else:
+            jobs = list(self.jobs.values())
+        name = query.get('name')
+        if name:
+            jobs = [job for job in jobs if name in job['c_jobname']]
+        state = query.get('state')
+        if state:
+            states = state.split(',')
+            jobs = [job for job in jobs if job['a_arcstate'] in states]
+        return jobs
+
+
+class MockHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Threaded HTTP server that does not print errors of closed connections."""
+
+    daemon_threads = True
+
+    def handle_error(self, request, clientAddress):
+        # clients close connections on purpose, e.g. when interrupted
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, clientAddress)
+
+
+class MockHandler(http.server.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately and would otherwise wait for
+    # delayed ACK of the client
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def mock(self):
+        return self.server.mock
+
+    def handle_one_request(self):
+        # delay every request by configured latency
+        if self.mock.latency:
+            self.rfile.peek(1)  # wait for request before sleeping
+            time.sleep(self.mock.latency)
+        super().handle_one_request()
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_PUT(self):
+        self.dispatch('PUT')
+
+    def do_PATCH(self):
+        self.dispatch('PATCH')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def do_MKCOL(self):
+        self.dispatch('MKCOL')
+
+    def do_PROPFIND(self):
+        self.dispatch('PROPFIND')
+
+    def dispatch(self, method):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path
+        body = self.readBody()
+
+        if self.mock.errorRate and method in FAILING_METHODS:
+            with self.mock.lock:
+                fail = self.mock.random.random() < self.mock.errorRate
+            if fail:
+                return self.sendJSON({'msg': 'Service temporarily unavailable'}, status=503)
+
+        if path.startswith('/webdav-node/'):
+            return self.webdavNode(method, path, body)
+        if path.startswith('/webdav/'):
+            return self.webdav(method, path, url.query)
+        match = re.match(r'/arex/rest/1.0/jobs/([^/]+)/session/(.+)$', path)
+        if match and method == 'GET':
+            return self.sendFile(self.mock.outputSize)
+        if path == '/jobs':
+            return self.jobsEndpoint(method, query, body)
+        match = re.match(r'/jobs/(\d+)/data/(.+)$', path)
+        if match and method == 'PUT':
+            with self.mock.lock:
+                self.mock.uploads[(int(match[1]), match[2])] = len(body)
+            return self.sendStatus(204)
+        match = re.match(r'/jobs/(\d+)/results/(.*)$', path)
+        if match and method == 'GET':
+            return self.results(int(match[1]), match[2])
+        if path == '/proxies':
+            return self.proxies(method, body)
+        if path == '/info' and method == 'GET':
+            info = {
+                'clusters': [DEFAULT_CLUSTER],
+                'arc': list(ARC_COLUMNS),
+                'client': list(CLIENT_COLUMNS),
+            }
+            if self.mock.inlineFileSize:
+                info['inlineFileSize'] = self.mock.inlineFileSize
+            return self.sendJSON(info)
+        self.sendJSON({'msg': f'Invalid request {method} {path}'}, status=400)
+
+    def jobsEndpoint(self, method, query, body):
+        mock = self.mock
+        if method == 'POST':
+            jobs = json.loads(body)
+            ids = [mock.addJob(job.get('clusterlist'), arcstate='') for job in jobs]
+            with mock.lock:
+                for jobid, job in zip(ids, jobs):
+                    for name, data in job.get('files', {}).items():
+                        mock.uploads[(jobid, name)] = len(base64.b64decode(data))
+            return self.sendJSON([{'id': jobid} for jobid in ids])
+
+        if method == 'PUT':
+            results = []
+            with mock.lock:
+                for job in json.loads(body):
+                    if job['id'] not in mock.jobs:
+                        results.append({'id': job['id'], 'msg': 'No job with given ID'})
+                        continue
+                    match = re.search(r'\(jobname\s*=\s*"([^"]*)"\)', job['desc'])
+                    row = mock.jobs[job['id']]
+                    if match:
+                        row['c_jobname'] = match[1]
+                    # jobs finish immediately so they can be downloaded
+                    row['a_arcstate'] = 'done'
+                    row['a_State'] = 'Finished'
+                    results.append({'id': job['id'], 'name': row['c_jobname']})
+            return self.sendJSON(results)
+
+        with mock.lock:
+            jobs = mock.filterJobs(query)
+            if method == 'GET':
+                clienttab = query.get('client', 'id,jobname').split(',')
+                arctab = query.get('arc', 'JobID,State,arcstate').split(',')
+                cols = [f'c_{col}' for col in clienttab] + [f'a_{col}' for col in arctab]
+                return self.sendJSON([{col: job.get(col) for col in cols} for job in jobs])
+            if method == 'PATCH':
+                action = query.get('action')
+                if action == 'cancel':
+                    rows = [
+                        {'c_id': job['c_id'], 'a_id': job['a_id'], 'a_arcstate': job['a_arcstate']}
+                        for job in jobs
+                    ]
+                    for job in jobs:
+                        job['a_arcstate'] = 'cancelling'
+                    return self.sendJSON(rows)
+                if action in ('fetch', 'resubmit'):
+                    return self.sendJSON([job['c_id'] for job in jobs])
+                return self.sendJSON({'msg': f'Invalid action {action}'}, status=400)
+            if method == 'DELETE':
+                for job in jobs:
+                    del mock.jobs[job['c_id']]
+                return self.sendJSON([job['c_id'] for job in jobs])
+        self.sendJSON({'msg': f'Invalid method {method}'}, status=405)
+
+    def results(self, jobid, relpath):
+        mock = self.mock
+        if jobid not in mock.jobs:
+            return self.sendJSON({'msg': f'No job with ID {jobid}'}, status=404)
+        names = [f'file{i}.dat' for i in range(mock.files)]
+        if not relpath:
+            if mock.archive and 'application/x-tar' in self.headers.get('Accept', ''):
+                return self.sendArchive(names)
+            return self.sendJSON({'file': names, 'dir': []})
+        if relpath not in names:
+            return self.sendJSON({'msg': f'No file {relpath}'}, status=404)
+        self.sendFile(mock.fileSize)
+
+    def proxies(self, method, body):
+        if method == 'POST':
+            return self.sendJSON({'token': 'mocktoken', 'csr': _getMockCSR()})
+        if method == 'PUT':
+            return self.sendJSON({'token': 'mocktoken'})
+        if method == 'DELETE':
+            return self.sendStatus(204)
+        self.sendJSON({'msg': f'Invalid method {method}'}, status=405)
+
+    def webdav(self, method, path, query):
+        mock = self.mock
+        if method == 'MKCOL':
+            return self.sendStatus(201)
+        if method == 'DELETE':
+            with mock.lock:
+                prefix = path.rstrip('/') + '/'
+                for key in [key for key in mock.webdav if key.startswith(prefix)]:
+                    del mock.webdav[key]
+            return self.sendStatus(204)
+        if method == 'PROPFIND':
+            prefix = path.rstrip('/') + '/'
+            with mock.lock:
+                files = {key: size for key, size in mock.webdav.items() if key.startswith(prefix)}
+            if not files:
+                return self.sendStatus(404)
+            responses = ''.join(
+                f'<d:response><d:href>{key}</d:href><d:propstat><d:prop>'
+                f'<d:getcontentlength>{size}</d:getcontentlength></d:prop>'
+                f'<d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>'
+                for key, size in files.items()
+            )
+            data = f'<?xml version="1.0"?><d:multistatus xmlns:d="DAV:">{responses}</d:multistatus>'.encode()
+            self.send_response(207)
+            self.send_header('Content-Type', 'application/xml')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            return self.sendBody(data)
+        if method == 'PUT':
+            # redirect to storage node like dCache does
+            self.send_response(307)
+            self.send_header('Location', f'{mock.url}/webdav-node{path}?mock=1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.sendStatus(405)
+
+    def webdavNode(self, method, path, body):
+        if method != 'PUT':
+            return self.sendStatus(405)
+        with self.mock.lock:
+            self.mock.webdav[path[len('/webdav-node'):]] = len(body)
+        self.sendStatus(201)
+
+    def readBody(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.throttledRead(size))
+                self.rfile.readline()
+            return b''.join(chunks)
+        length = int(self.headers.get('Content-Length', 0))
+        return self.throttledRead(length)
+
+    def throttledRead(self, size):
+        data = self.rfile.read(size)
+        if self.mock.bandwidth:
+            time.sleep(len(data) / self.mock.bandwidth)
+        return data
+
+    def sendStatus(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def sendJSON(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.sendBody(body)
+
+    def sendFile(self, size):
+        # Content is generated and Range is supported for first-last and
+        # suffix ranges.
+        start, end, status = 0, size, 200
+        match = re.match(r'bytes=(\d*)-(\d*)$', self.headers.get('Range', ''))
+        if match:
+            if match[1]:
+                start = int(match[1])
+                if match[2]:
+                    end = min(int(match[2]) + 1, size)
+            elif match[2]:
+                start = max(size - int(match[2]), 0)
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status = 206
+        self.send_response(status)
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end - 1}/{size}')
+        self.send_header('Content-Length', str(end - start))
+        self.end_headers()
+        self.sendBody(_getContent(start, end))
+
+    def sendArchive(self, names):
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode='w') as tar:
+            for name in names:
+                info = tarfile.TarInfo(name)
+                info.size = self.mock.fileSize
+                tar.addfile(info, io.BytesIO(_getContent(0, self.mock.fileSize)))
+        body = buf.getvalue()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-tar')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.sendBody(body)
+
+    def sendBody(self, body):
+        bandwidth = self.mock.bandwidth
+        view = memoryview(body)
+        try:
+            for start in range(0, len(view), SEND_CHUNK_SIZE):
+                chunk = view[start:start + SEND_CHUNK_SIZE]
+                self.wfile.write(chunk)
+                if bandwidth:
+                    time.sleep(len(chunk) / bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+_CONTENT_LINE = b'mock output line of fixed length for benchmarks ...\n'
+
+
+def _getContent(start, end):
+    # repeating lines of text so that the content of any range is known
+    size = len(_CONTENT_LINE)
+    first = start // size
+    last = -(-end // size)
+    data = _CONTENT_LINE * (last - first)
+    offset = first * size
+    return data[start - offset:end - offset]
+
+
+_mockCSR = None
+
+
+def _getMockCSR():
+    global _mockCSR
+    if _mockCSR is None:
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from cryptography.x509.oid import NameOID
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'mock')])
+        csr = x509.CertificateSigningRequestBuilder().subject_name(name).sign(key, hashes.SHA256())
+        _mockCSR = csr.public_bytes(serialization.Encoding.PEM).decode()
+    return _mockCSR
@@ -1,77 +1,162 @@
+import base64
+import codecs
+import concurrent.futures
+import fnmatch
 import http.client
 import json
 import logging
 import os
 import queue
+import re
 import signal
+import stat
 import sys
+import tarfile
+import threading
+import time
 from urllib.parse import urlparse
+from xml.etree import ElementTree
 
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
-from pyarcrest.http import HTTPClient
 from pyarcrest.x509 import parsePEM, signRequest
 
-from act_client.common import HTTP_BUFFER_SIZE, ACTClientError, Signal
+from act_client.codec import JSONCodec
+from act_client.common import (DOWNLOAD_CONNECTIONS, HTTP_BUFFER_SIZE,
+                               INLINE_BATCH_SIZE, INLINE_FILE_SIZE,
+                               JSON_BUFFER_SIZE, RANGE_DOWNLOAD_SIZE,
+                               ACTClientError, Signal, getIDRanges,
+                               getTransferBuffer)
+from act_client.credentials import checkTokenExpiry, loadCredCache
+from act_client.retry import RetryHTTPClient, getRetryPolicy, isTransientError
+from act_client.tracing import getTracer
+from act_client.upload import InputFileCache, openUpload
 from act_client.xrsl import XRSLParser
 
+# media types of results archives and Accept header that requests them
+ARCHIVE_TYPES = ('application/x-tar', 'application/gzip', 'application/x-gzip')
+ARCHIVE_ACCEPT = 'application/x-tar, application/gzip;q=0.9, application/json;q=0.5'
+
+# WebDAV PROPFIND request body that asks only for sizes of files
+PROPFIND_SIZE = (
+    b'<?xml version="1.0" encoding="utf-8"?>'
+    b'<propfind xmlns="DAV:"><prop><getcontentlength/></prop></propfind>'
+)
+
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
 
 class ACTRest:
 
-    def __init__(self, url, token=None, logger=None):
+    def __init__(self, url, token=None, logger=None, codec=None, tracer=None, progress=None, retry=None):
         self.logger = logger
         if self.logger is None:
             self.logger = getNullLogger()
 
-        self.token = token
-        self.httpClient = HTTPClient(url, logger=self.logger)
+        self.codec = codec
+        if self.codec is None:
+            self.codec = JSONCodec()
 
-    def request(self, *args, **kwargs):
-        resp = self.httpClient.request(*args, **kwargs)
-        data = resp.read().decode()
+        self.url = url
+        self.token = token
+        self.tracer = tracer
+        self.progress = progress  # receives transferred bytes and jobs
+        self.retry = retry
+        self.inlineFileSize = None  # queried from server when needed
+        self.httpClient = RetryHTTPClient(url, logger=self.logger, tracer=tracer, retry=retry)
+
+    def request(self, *args, jsonData=None, headers=None, **kwargs):
+        # JSON body is encoded here to use the selected codec instead of the
+        # one in HTTPClient. Headers are always passed explicitly because
+        # the default headers in HTTPClient persist between requests.
+        if headers is None:
+            headers = {}
+        if jsonData:
+            kwargs['data'] = self.codec.dumps(jsonData)
+            headers['Content-Type'] = 'application/json'
+        resp = self.httpClient.request(*args, headers=headers, **kwargs)
+        data = resp.read()
         try:
-            return json.loads(data), resp.status
-        except json.JSONDecodeError:
+            return self.codec.loads(data), resp.status
+        except ValueError:
             raise ACTClientError('Error decoding JSON: aCT REST might not be running')
 
+    def streamRequest(self, *args, headers=None, **kwargs):
+        """
+        Return an iterator over elements of JSON array response and status.
+
+        Elements are decoded incrementally as they arrive. Error responses
+        are decoded whole and returned instead of the iterator.
+        """
+        if headers is None:
+            headers = {}
+        resp = self.httpClient.request(*args, headers=headers, **kwargs)
+        if resp.status != 200:
+            data = resp.read()
+            try:
+                return self.codec.loads(data), resp.status
+            except ValueError:
+                raise ACTClientError('Error decoding JSON: aCT REST might not be running')
+        return self._iterResponse(resp), resp.status
+
+    def _iterResponse(self, resp):
+        # The connection cannot be reused if the response is not read to
+        # the end so it is closed and reopened on next request.
+        done = False
+        try:
+            yield from _iterJSONArray(resp)
+            done = True
+        finally:
+            if not done:
+                self.httpClient.close()
+
     def manageJobs(self, method, errmsg, jobids=[], name='', state='', actionParam=None, clienttab=[], arctab=[]):
-        params = {}
-        if jobids:
-            params['id'] = jobids
-        if name:
-            params['name'] = name
-        if state:
-            params['state'] = state
-        if actionParam:
-            params['action'] = actionParam
-        if clienttab:
-            params['client'] = clienttab
-        if arctab:
-            params['arc'] = arctab
-        jsonData, status = self.request(method, '/jobs', token=self.token, params=params)
-        self.logger.debug(f"Job manage response - {status} {jsonData}")
+        params = _getJobParams(jobids, name, state, actionParam, clienttab, arctab)
+        # PATCH actions only set job states so they can be repeated
+        jsonData, status = self.request(method, '/jobs', token=self.token, params=params, idempotent=True)
+        # lazy formatting to avoid formatting of big responses without debug
+        self.logger.debug("Job manage response - %s %s", status, jsonData)
         if status != 200:
             raise ACTClientError(f'{errmsg}: {jsonData["msg"]}')
         return jsonData
 
+    def iterManageJobs(self, method, errmsg, jobids=[], name='', state='', actionParam=None, clienttab=[], arctab=[]):
+        params = _getJobParams(jobids, name, state, actionParam, clienttab, arctab)
+        # PATCH actions only set job states so they can be repeated
+        jsonData, status = self.streamRequest(method, '/jobs', token=self.token, params=params, idempotent=True)
+        self.logger.debug(f"Job manage response - {status}")
+        if status != 200:
+            raise ACTClientError(f'{errmsg}: {jsonData["msg"]}')
+        yield from jsonData
+
+    # IDs are sent as ranges of consecutive IDs and batchSize limits the
+    # number of ranges and single IDs per request.
     def manageJobBatch(self, *args, batchSize=100, jobids=[], **kwargs):
         if not jobids:
             return self.manageJobs(*args, jobids=jobids, **kwargs)
         results = []
-        ix = 0
-        while ix < len(jobids):
-            results.extend(
-                self.manageJobs(*args, jobids=jobids[ix:ix+batchSize], **kwargs)
-            )
-            ix += batchSize
+        for batch in _sublistGenerator(getIDRanges(jobids), size=batchSize):
+            results.extend(self.manageJobs(*args, jobids=batch, **kwargs))
         return results
 
+    def iterManageJobBatch(self, *args, batchSize=100, jobids=[], **kwargs):
+        if not jobids:
+            yield from self.iterManageJobs(*args, jobids=jobids, **kwargs)
+            return
+        for batch in _sublistGenerator(getIDRanges(jobids), size=batchSize):
+            yield from self.iterManageJobs(*args, jobids=batch, **kwargs)
+
     def cleanJobs(self, jobids=[], name='', state=''):
         return self.manageJobBatch(
             'DELETE', 'Error cleaning jobs', jobids=jobids, name=name, state=state
         )
 
+    def iterCleanJobs(self, jobids=[], name='', state=''):
+        return self.iterManageJobBatch(
+            'DELETE', 'Error cleaning jobs', jobids=jobids, name=name, state=state
+        )
+
     def fetchJobs(self, jobids=[], name=''):
         return self.manageJobBatch(
             'PATCH', 'Error fetching jobs', jobids=jobids, name=name, actionParam='fetch'
@@ -82,24 +167,62 @@ class ACTRest:
             'PATCH', 'Error killing jobs', jobids=jobids, name=name, state=state, actionParam='cancel'
         )
 
+    def iterKillJobs(self, jobids=[], name='', state=''):
+        return self.iterManageJobBatch(
+            'PATCH', 'Error killing jobs', jobids=jobids, name=name, state=state, actionParam='cancel'
+        )
+
     def resubmitJobs(self, jobids=[], name=''):
         return self.manageJobBatch(
             'PATCH', 'Error resubmitting jobs', jobids=jobids, name=name, actionParam='resubmit'
         )
 
     def getJobStats(self, jobids=[], name='', state='', clienttab=[], arctab=[]):
-        return self.manageJobBatch(
-            'GET', 'Error getting job status', jobids=jobids, name=name, state=state, clienttab=clienttab, arctab=arctab
-        )
+        return list(self.iterJobStats(jobids=jobids, name=name, state=state, clienttab=clienttab, arctab=arctab))
+
+    def iterJobStats(self, jobids=[], name='', state='', clienttab=[], arctab=[]):
+        # state can also be a collection of states
+        if isinstance(state, str) or len(state) == 1:
+            state = state if isinstance(state, str) else next(iter(state))
+            yield from self.iterManageJobBatch(
+                'GET', 'Error getting job status', jobids=jobids, name=name, state=state, clienttab=clienttab, arctab=arctab
+            )
+            return
 
-    def uploadFile(self, jobid, name, path):
-        try:
-            f = open(path, 'rb')
-        except Exception as e:
-            raise ACTClientError(f'Error opening file {path}: {e}')
+        if not jobids:
+            # server filters the whole table for every state
+            for st in sorted(state):
+                yield from self.iterJobStats(name=name, state=st, clienttab=clienttab, arctab=arctab)
+            return
 
-        resp = self.httpClient.request('PUT', f'/jobs/{jobid}/data/{name}', token=self.token, data=f)
-        text = resp.read().decode()
+        # every batch of IDs is queried once and filtered by state here
+        cols = list(arctab)
+        if 'arcstate' not in cols:
+            cols.append('arcstate')
+        for job in self.iterManageJobBatch(
+            'GET', 'Error getting job status', jobids=jobids, name=name, clienttab=clienttab, arctab=cols
+        ):
+            if job.get('a_arcstate') in state:
+                if 'arcstate' not in arctab:
+                    del job['a_arcstate']
+                yield job
+
+    def getJobSummary(self, jobids=[], name='', state='', keys=('arcstate', 'State', 'cluster')):
+        # aCT REST has no aggregation endpoint so jobs are counted here, the
+        # response still has a row for every job but only with grouped columns
+        jobs = self.iterJobStats(jobids=jobids, name=name, state=state, arctab=list(keys))
+        summary = {key: {} for key in keys}
+        for job in jobs:
+            for key in keys:
+                value = job.get(f'a_{key}')
+                summary[key][value] = summary[key].get(value, 0) + 1
+        return summary
+
+    def uploadFile(self, jobid, name, path):
+        # directories are uploaded as tar streams
+        with openUpload(path, name, self.progress) as data:
+            resp = self.httpClient.request('PUT', f'/jobs/{jobid}/data/{name}', token=self.token, data=data)
+            text = resp.read().decode()
         self.logger.debug(f"Upload of file {name} from path {path} for job {jobid} - {resp.status} {text}")
         if resp.status != 204:
             jsonData = json.loads(text)
@@ -109,18 +232,29 @@ class ACTRest:
         clienttab = ['id', 'jobname']
         arctab = ['IDFromEndpoint']
         if state:
-            if state not in ('done', 'donefailed'):
-                raise ACTClientError('State parameter not "done" or "donefailed"')
-            jobs = self.getJobStats(jobids=jobids, name=name, state=state, clienttab=clienttab, arctab=arctab)
+            states = [state] if isinstance(state, str) else list(state)
+            for st in states:
+                if st not in ('done', 'donefailed'):
+                    raise ACTClientError('State parameter not "done" or "donefailed"')
         else:
-            jobs = self.getJobStats(jobids=jobids, name=name, state='done', clienttab=clienttab, arctab=arctab)
-            jobs.extend(self.getJobStats(jobids=jobids, name=name, state='donefailed', clienttab=clienttab, arctab=arctab))
-        return jobs
-
-    def downloadJobResults(self, jobid, downloadDir=None):
+            states = ['done', 'donefailed']
+        return self.getJobStats(jobids=jobids, name=name, state=states, clienttab=clienttab, arctab=arctab)
+
+    def downloadJobResults(self, jobid, downloadDir=None, connections=DOWNLOAD_CONNECTIONS, archive=True, include=None, exclude=None):
+        # If archive is requested, the server can respond to the top listing
+        # request with a tar stream of all results instead of the listing.
+        # Otherwise, every listing and file is requested separately.
+        #
+        # include and exclude are lists of glob patterns matched against
+        # paths relative to results directory. Files and directories that
+        # are filtered out are never requested. Archive would contain all
+        # files so it is not requested with filters.
+        if include or exclude:
+            archive = False
+        rootURL = f"/jobs/{jobid}/results/"
         transferQueue = queue.Queue()
         transferQueue.put({
-            "url": f"/jobs/{jobid}/results/",
+            "url": rootURL,
             "type": "listing",
             "path": downloadDir
         })
@@ -128,12 +262,31 @@ class ACTRest:
         anyResults = False
         while not transferQueue.empty():
             trdict = transferQueue.get()
+            headers = {}
+            if archive and trdict["url"] == rootURL:
+                headers['Accept'] = ARCHIVE_ACCEPT
             try:
-                resp = self.httpClient.request('GET', trdict["url"], token=self.token)
+                resp = self.httpClient.request('GET', trdict["url"], token=self.token, headers=headers)
             except Exception as exc:
                 msg = f"Error downloading {trdict['url']}: {exc}"
                 self.logger.debug(msg)
                 errors.append(msg)
+                continue
+
+            if trdict["type"] == "listing" and resp.status == 200 and _isArchive(resp):
+                self.logger.debug(f"Response for listing {trdict['url']} - {resp.status} {resp.getheader('Content-Type')}")
+                try:
+                    anyResults = _extractTarStream(resp, trdict["path"], self.logger, progress=self.progress)
+                    resp.read()  # padding after the end of archive
+                except Exception as exc:
+                    if self._retryTransfer(transferQueue, trdict, exc):
+                        continue
+                    msg = f"Error extracting results archive {trdict['url']} to {trdict['path']}: {exc}"
+                    self.logger.debug(msg)
+                    errors.append(msg)
+                    # the rest of archive might not be read
+                    self.httpClient.close()
+                return anyResults, errors
 
             if trdict["type"] == "listing":
                 text = resp.read().decode()
@@ -145,13 +298,20 @@ class ACTRest:
                     self.logger.debug(f"No results for job {jobid}")
                     return anyResults, errors
                 listing = json.loads(text)
+                relpath = trdict["url"][len(rootURL):]
                 for filename in listing["file"]:
+                    if not _isResultIncluded(f"{relpath}{filename}", include, exclude):
+                        self.logger.debug(f"Skipping filtered file {trdict['url']}{filename}")
+                        continue
                     transferQueue.put({
                         "url": f"{trdict['url']}{filename}",
                         "type": "file",
                         "path": os.path.join(trdict['path'], filename)
                     })
                 for dirname in listing["dir"]:
+                    if _isResultDirPruned(f"{relpath}{dirname}/", include, exclude):
+                        self.logger.debug(f"Skipping filtered directory {trdict['url']}{dirname}/")
+                        continue
                     transferQueue.put({
                         "url": f"{trdict['url']}{dirname}/",
                         "type": "listing",
@@ -166,8 +326,14 @@ class ACTRest:
                     continue
                 try:
                     os.makedirs(os.path.dirname(trdict["path"]), exist_ok=True)
-                    _storeTransferChunks(resp, trdict["path"])
+                    size = int(resp.getheader('Content-Length', 0))
+                    if connections > 1 and size >= RANGE_DOWNLOAD_SIZE and resp.getheader('Accept-Ranges') == 'bytes':
+                        self.downloadRanges(resp, trdict["url"], trdict["path"], size, connections)
+                    else:
+                        _storeTransferChunks(resp, trdict["path"], progress=self.progress)
                 except Exception as exc:
+                    if self._retryTransfer(transferQueue, trdict, exc):
+                        continue
                     msg = f"Error downloading file {trdict['url']} to {trdict['path']}: {exc}"
                     self.logger.debug(msg)
                     errors.append(msg)
@@ -177,6 +343,74 @@ class ACTRest:
 
         return anyResults, errors
 
+    def _retryTransfer(self, transferQueue, trdict, exc):
+        # Requests are retried by HTTP client but not failures while the
+        # body is read. Those transfers are queued again from the start.
+        retry = self.httpClient.retry
+        attempt = trdict.get('attempt', 0)
+        if not isTransientError(exc) or attempt >= retry.retries:
+            return False
+        delay = retry.getDelay(attempt)
+        self.logger.debug(f"Retrying transfer of {trdict['url']} in {delay:.2f}s after error: {exc}")
+        self.httpClient.close()
+        time.sleep(delay)
+        transferQueue.put(dict(trdict, attempt=attempt + 1))
+        return True
+
+    def downloadRanges(self, resp, url, path, size, connections):
+        """
+        Download the file from response over several connections.
+
+        The file is split into byte ranges. The first one is read from the
+        given response and others are requested over new connections in
+        parallel. Ranges are written in place to a preallocated file.
+        """
+        partSize = -(-size // connections)  # ceiling division
+        ranges = [(start, min(start + partSize, size)) for start in range(0, size, partSize)]
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        except Exception as exc:
+            raise ACTClientError(f'Error opening file {path}: {exc}')
+
+        stop = threading.Event()
+        try:
+            _preallocate(fd, size)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(ranges) - 1) as executor:
+                futures = [
+                    executor.submit(self._downloadRange, url, fd, start, end, stop)
+                    for start, end in ranges[1:]
+                ]
+                try:
+                    start, end = ranges[0]
+                    _pwriteChunks(resp, fd, start, end, stop, progress=self.progress)
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    stop.set()
+                    raise
+                finally:
+                    # the rest of the first response is not read so the
+                    # connection cannot be reused
+                    self.httpClient.close()
+        except ACTClientError:
+            raise
+        except Exception as exc:
+            raise ACTClientError(f'Error storing ranges to file {path}: {exc}')
+        finally:
+            os.close(fd)
+
+    def _downloadRange(self, url, fd, start, end, stop):
+        httpClient = RetryHTTPClient(self.url, logger=self.logger, tracer=self.tracer, retry=self.retry)
+        try:
+            headers = {'Range': f'bytes={start}-{end - 1}'}
+            resp = httpClient.request('GET', url, token=self.token, headers=headers)
+            self.logger.debug(f"Response for range {start}-{end - 1} of {url} - {resp.status}")
+            if resp.status != 206:
+                raise ACTClientError(f'Error fetching range {start}-{end - 1} of {url}: status {resp.status}')
+            _pwriteChunks(resp, fd, start, end, stop, progress=self.progress)
+        finally:
+            httpClient.close()
+
     def deleteProxy(self):
         resp = self.httpClient.request('DELETE', '/proxies', token=self.token)
         text = resp.read().decode()
@@ -235,44 +469,80 @@ class ACTRest:
     # SIGINT is disabled to ensure uninterrupted execution where necessary.
     # Reverse iterations are done to allow deletion of elements from the list
     # without messing up iteration.
-    def submitJobBatch(self, descs, clusterlist, webdavClient, webdavBase):
-        # Create a list of results, a list of jobs to be worked on and a JSON
-        # structure for POST to REST API.
-        sigint = parser = None
+    def submitJobBatch(self, results, jobs, webdavClient, webdavBase, journal=None, inputCache=None):
+        # Submit a list of parsed jobs. Results are the jobs and errors of
+        # descriptions from _prepareJobs() and jobs are the ones to be
+        # worked on, already resumed and with input files checked by
+        # submitJobs().
+        if inputCache is None:
+            inputCache = InputFileCache()
         try:
             sigint = Signal(signal.SIGINT, callback=lambda: print("\nCancelling submission ..."))
-            parser = XRSLParser()
-            results, jobs, jsonData = _prepareJobs(descs, clusterlist, parser)
         except KeyboardInterrupt:
             raise SubmissionInterrupt()
         else:
             sigint.defer()
 
+        newJobs = [job for job in jobs if 'id' not in job]
+
+        # Small input files are sent with POST if server accepts them instead
+        # of every file in a separate request. WebDAV has no such request.
+        inlineSize = 0 if webdavBase or not newJobs else self.getInlineFileSize()
+        budget = INLINE_BATCH_SIZE
+        jsonData = []
+        for job in newJobs:
+            jobData = {'clusterlist': job['clusterlist']}
+            if inlineSize and budget > 0:
+                files, size = _readInlineFiles(job, inputCache, inlineSize, budget)
+                if files:
+                    jobData['files'] = files
+                    job['inlined'] = (list(files), size)
+                    budget -= size
+            jsonData.append(jobData)
+
         # submit jobs to aCT
-        jsonData, status = self.request('POST', '/jobs', token=self.token, jsonData=jsonData)
-        self.logger.debug(f"Jobs POST response - {status} {jsonData}")
-        if status != 200:
-            raise ACTClientError(f'Error creating jobs: {jsonData["msg"]}')
+        if jsonData:
+            jsonData, status = self.request('POST', '/jobs', token=self.token, jsonData=jsonData)
+            self.logger.debug("Jobs POST response - %s %s", status, jsonData)
+            if status != 200:
+                raise ACTClientError(f'Error creating jobs: {jsonData["msg"]}')
 
         # Parse job descriptions of jobs without errors. Jobs with submission
         # errors are removed from the working set.
-        for i in range(len(jobs) - 1, -1, -1):
-            if 'msg' in jsonData[i]:
-                jobs[i]['msg'] = jsonData[i]['msg']
-                jobs.pop(i)
+        for job, result in zip(newJobs, jsonData):
+            if 'msg' in result:
+                job['msg'] = result['msg']
                 continue
 
-            jobs[i]['id'] = jsonData[i]['id']
+            job['id'] = result['id']
+            if journal:
+                journal.record('posted', desc=job['descpath'], index=job['index'], id=job['id'])
+
+            # inlined files are stored with created job
+            if 'inlined' in job:
+                names, size = job.pop('inlined')
+                job['uploaded'] = set(names)
+                if self.progress:
+                    self.progress.addBytes(size)
+                if journal:
+                    for name in names:
+                        journal.record('uploaded', id=job['id'], file=name)
 
             # All jobs that were successfully POSTed need to be killed
             # unless the submission succeeds
-            jobs[i]['cleanup'] = True
+            job['cleanup'] = True
+        jobs[:] = [job for job in jobs if 'msg' not in job]
+
+        # IDs of created jobs prevent duplicate jobs on resume so they are
+        # synced before anything else is done with the jobs
+        if journal and newJobs:
+            journal.sync()
 
         # upload input files
         try:
             sigint.restore()
             for job in jobs:
-                self.uploadJobData(job, webdavClient, webdavBase)
+                self.uploadJobData(job, webdavClient, webdavBase, journal, inputCache)
         except KeyboardInterrupt:
             raise SubmissionInterrupt(results)
         else:
@@ -286,7 +556,7 @@ class ACTRest:
                 jobs.pop(i)
                 continue
 
-            jobs[i]['descstr'] = parser.unparse(jobs[i]['desc'])
+            jobs[i]['descstr'] = XRSLParser.unparse(jobs[i]['desc'])
             if not jobs[i]['descstr']:
                 jobs[i]['msg'] = 'Error generating job description'
                 jobs.pop(i)
@@ -303,12 +573,13 @@ class ACTRest:
         if jsonData:
             try:
                 jsonData, status = self.request('PUT', '/jobs', token=self.token, jsonData=jsonData)
-                self.logger.debug(f"Jobs PUT response - {status} {jsonData}")
+                self.logger.debug("Jobs PUT response - %s %s", status, jsonData)
             except ACTClientError as exc:
                 self.logger.debug(f"Jobs PUT error: {exc}")
                 error = str(exc)
-            if status != 200:
-                error = jsonData['msg']
+            else:
+                if status != 200:
+                    error = jsonData['msg']
             if error:
                 for job in jobs:
                     job['msg'] = error
@@ -324,6 +595,10 @@ class ACTRest:
                     job['msg'] = result['msg']
                 else:
                     job['cleanup'] = False
+                    if journal:
+                        journal.record('submitted', id=job['id'], name=job.get('name', ''))
+        if journal:
+            journal.sync()
 
         try:
             sigint.restore()
@@ -332,54 +607,67 @@ class ACTRest:
         else:
             return results
 
-    def submitJobs(self, descs, clusterlist, webdavClient, webdavBase):
+    def submitJobs(self, descs, clusterlist, webdavClient, webdavBase, journal=None):
+        # input files shared by jobs are checked only once in all batches
+        inputCache = InputFileCache()
         results = []
-        for batch in _sublistGenerator(descs, size=100):
-            print("Submitting batch of 100 jobs ...")
+
+        # All descriptions are parsed first so that progress is reported
+        # out of the total number of jobs. Jobs that were created by
+        # interrupted submission are continued instead of created again.
+        # Local input files of all jobs are checked before any job is
+        # created so that jobs with invalid inputs fail early and are not
+        # created at all.
+        try:
+            parser = XRSLParser()
+            batches = [
+                _prepareJobs(batch, clusterlist, parser)
+                for batch in _sublistGenerator(descs, size=100)
+            ]
+            for batchResults, jobs in batches:
+                if journal:
+                    _resumeJobs(batchResults, jobs, journal)
+                for job in jobs:
+                    job['inputs'] = _checkInputFiles(job, inputCache)
+                jobs[:] = [job for job in jobs if 'msg' not in job]
+        except KeyboardInterrupt:
+            raise SubmissionInterrupt()
+        if self.progress:
+            self.progress.total = sum(len(batchResults) for batchResults, _ in batches)
+
+        for batchResults, jobs in batches:
+            if not self.progress or not self.progress.show:
+                print(f"Submitting batch of {len(jobs)} jobs ...")
             try:
-                results.extend(self.submitJobBatch(batch, clusterlist, webdavClient, webdavBase))
+                batchResults = self.submitJobBatch(batchResults, jobs, webdavClient, webdavBase, journal, inputCache)
             except SubmissionInterrupt as exc:
                 results.extend(exc.results)
                 raise SubmissionInterrupt(results)
+            results.extend(batchResults)
+            if self.progress:
+                errors = sum(1 for job in batchResults if 'msg' in job)
+                self.progress.addJobs(len(batchResults), errors=errors)
         return results
 
-    def uploadJobData(self, job, webdavClient, webdavBase):
-        # create a dictionary of files to upload
-        files = {}
-        for infile in job['desc'].get('inputfiles', []):
-            path = infile[1]
-            if not path:
-                path = infile[0]
-
-            # parse as URL, remote resource if scheme or hostname
-            try:
-                url = urlparse(path)
-            except ValueError as e:
-                job['msg'] = f'Error parsing source of file {infile[0]}: {e}'
-                return
-
-            # skip non local files
-            if url.scheme not in ('file', None, '') or url.hostname:
-                continue
-
-            # check if local file exists
-            path = url.path
-            if not os.path.isfile(path):
-                job['msg'] = f'Given path {path} is not a file'
+    def uploadJobData(self, job, webdavClient, webdavBase, journal=None, inputCache=None):
+        # local input files by name, checked before submission of batch
+        files = job.get('inputs')
+        if files is None:
+            files = _checkInputFiles(job, inputCache or InputFileCache())
+            if 'msg' in job:
                 return
 
-            # modify job description if using WebDAV
-            if webdavBase:
-                url = f'{webdavBase}/{job["id"]}/{infile[0]}'
-                infile[1] = url
-
-            files[infile[0]] = path
+        # modify job description if using WebDAV
+        if webdavBase:
+            for infile in job['desc'].get('inputfiles', []):
+                if infile[0] in files:
+                    infile[1] = f'{webdavBase}/{job["id"]}/{infile[0]}'
 
-        # create job directory in WebDAV storage
+        # create job directory in WebDAV storage, resumed jobs might have it
         if webdavBase:
             try:
                 dirURL = f"{webdavBase}/{job['id']}"
-                webdavClient.mkdir(dirURL)
+                webdavClient.mkdir(dirURL, existOk='uploaded' in job)
                 self.logger.debug(f"Created WebDAV directory {dirURL}")
             except Exception as exc:
                 self.logger.debug(f"Error creating WebDAV directory {dirURL}: {exc}")
@@ -388,6 +676,8 @@ class ACTRest:
 
         # upload input files
         for dst, src in files.items():
+            if dst in job.get('uploaded', ()):
+                continue
             try:
                 if webdavBase:
                     fileURL = f"{webdavBase}/{job['id']}/{dst}"
@@ -400,22 +690,40 @@ class ACTRest:
                 self.logger.debug(f"Error uploading {src} to {dst} for job {job['id']}: {exc}")
                 job['msg'] = f'Error uploading {src} to {dst}: {exc}'
                 return
+            if journal:
+                journal.record('uploaded', id=job['id'], file=dst)
 
     def getInfo(self):
         return self.request('GET', '/info', token=self.token)
 
+    def getInlineFileSize(self):
+        """Return max size of input files sent with POST, 0 if not accepted."""
+        if self.inlineFileSize is None:
+            try:
+                jsonData, status = self.getInfo()
+            except ACTClientError:
+                jsonData, status = None, None
+            size = 0
+            if status == 200 and isinstance(jsonData, dict):
+                size = jsonData.get('inlineFileSize', 0)
+            self.inlineFileSize = min(size, INLINE_FILE_SIZE)
+        return self.inlineFileSize
+
     def close(self):
         self.httpClient.close()
 
 
 class WebDAVClient:
 
-    def __init__(self, url, proxypath=None, logger=None):
+    def __init__(self, url, proxypath=None, logger=None, tracer=None, progress=None, retry=None):
         self.logger = logger
         if self.logger is None:
             self.logger = getNullLogger()
 
-        self.httpClient = HTTPClient(url, proxypath=proxypath, logger=self.logger)
+        self.tracer = tracer
+        self.progress = progress
+        self.retry = retry
+        self.httpClient = RetryHTTPClient(url, proxypath=proxypath, logger=self.logger, tracer=tracer, retry=retry)
 
     def rmdir(self, url):
         headers = {'Accept': '*/*', 'Connection': 'Keep-Alive'}
@@ -429,24 +737,43 @@ class WebDAVClient:
         if resp.status >= 300:
             raise ACTClientError(f'Unexpected response for removal of WebDAV directory: {text}')
 
-    def mkdir(self, url):
+    def mkdir(self, url, existOk=False):
         headers = {'Accept': '*/*', 'Connection': 'Keep-Alive'}
         resp = self.httpClient.request('MKCOL', url, headers=headers)
         text = resp.read().decode()
         self.logger.debug(f"WebDAV MKDIR response - {resp.status} {text}")
 
+        if existOk and resp.status == 405:  # MKCOL of existing collection
+            return
         if resp.status != 201:
             raise ACTClientError(f'Error creating WebDAV directory {url}: {text}')
 
+    def getDirSize(self, url):
+        """Return the size of files in WebDAV directory, 0 if it does not exist."""
+        headers = {'Accept': '*/*', 'Depth': '1', 'Content-Type': 'application/xml'}
+        resp = self.httpClient.request('PROPFIND', url, headers=headers, data=PROPFIND_SIZE)
+        text = resp.read()
+        self.logger.debug(f"WebDAV PROPFIND response - {resp.status}")
+
+        if resp.status == 404:
+            return 0
+        if resp.status != 207:
+            raise ACTClientError(f'Unexpected response for listing of WebDAV directory {url}: {text.decode()}')
+        try:
+            root = ElementTree.fromstring(text)
+        except ElementTree.ParseError as exc:
+            raise ACTClientError(f'Error parsing listing of WebDAV directory {url}: {exc}')
+        return sum(int(elem.text) for elem in root.iter('{DAV:}getcontentlength') if elem.text)
+
     def uploadFile(self, url, path):
         self.logger.debug(f"Uploading {path} to {url}")
         try:
-            f = open(path, 'rb')
-        except Exception as exc:
+            data = openUpload(path, url.rsplit('/', 1)[-1], self.progress)
+        except ACTClientError as exc:
             self.logger.debug(f"Error uploading {path} to {url}: {exc}")
-            raise ACTClientError(f'Error opening file {path}: {exc}')
+            raise
 
-        with f:
+        with data:
             resp = self.httpClient.request('PUT', url, headers={'Expect': '100-continue'})
             resp.read()
             self.logger.debug(f"Upload redirect check status: {resp.status}")
@@ -455,12 +782,12 @@ class WebDAVClient:
                 self.logger.debug(f"Redirecting upload to {dstURL}")
                 parts = urlparse(dstURL)
                 urlPath = f'{parts.path}?{parts.query}'
-                nodeClient = HTTPClient(dstURL, logger=self.logger)
+                nodeClient = RetryHTTPClient(dstURL, logger=self.logger, tracer=self.tracer, retry=self.retry)
                 try:
                     # if headers are not explicitly set to empty they will
                     # somehow be taken from previous separate connection
                     # contexts?
-                    resp = nodeClient.request('PUT', urlPath, data=f, headers={})
+                    resp = nodeClient.request('PUT', urlPath, data=data, headers={})
                     text = resp.read()
                     status = resp.status
                     self.logger.debug(f"Upload of {path} to {urlPath} response - {status} {text}")
@@ -470,7 +797,7 @@ class WebDAVClient:
                 finally:
                     nodeClient.close()
             else:
-                resp = self.httpClient.request('PUT', url, data=f)
+                resp = self.httpClient.request('PUT', url, data=data)
                 text = resp.read()
                 status = resp.status
                 self.logger.debug(f"Upload of {path} to {url} response - {status} {text}")
@@ -492,23 +819,345 @@ class WebDAVClient:
         self.httpClient.close()
 
 
-def _storeTransferChunks(resp, filename, chunksize=HTTP_BUFFER_SIZE):
+class ARCSessionFetcher:
+    """
+    Fetch files from session directories of jobs on ARC clusters.
+
+    Fetches can run concurrently from several threads. A limited number
+    of connections is opened to every cluster and idle ones are reused.
+    """
+
+    def __init__(self, proxypath, logger=None, connections=DOWNLOAD_CONNECTIONS, tracer=None, retry=None):
+        self.logger = logger
+        if self.logger is None:
+            self.logger = getNullLogger()
+
+        self.tracer = tracer
+        self.retry = retry
+        self.proxypath = proxypath
+        self.connections = connections
+        self.lock = threading.Lock()
+        self.slots = {}  # semaphore limiting connections per cluster
+        self.idle = {}  # idle clients per cluster
+        self.clients = []  # all created clients to be closed
+
+    def _acquire(self, cluster):
+        with self.lock:
+            slots = self.slots.setdefault(cluster, threading.BoundedSemaphore(self.connections))
+        slots.acquire()
+        with self.lock:
+            idle = self.idle.setdefault(cluster, [])
+            if idle:
+                return idle.pop()
+        try:
+            httpClient = RetryHTTPClient(
+                url=cluster, proxypath=self.proxypath, logger=self.logger, tracer=self.tracer, retry=self.retry
+            )
+        except Exception as exc:
+            slots.release()
+            raise ACTClientError(f'Error creating REST client for ARC cluster {cluster}: {exc}')
+        with self.lock:
+            self.clients.append(httpClient)
+        return httpClient
+
+    def _release(self, cluster, httpClient, reuse=True):
+        if reuse:
+            with self.lock:
+                self.idle[cluster].append(httpClient)
+        else:
+            httpClient.close()
+        self.slots[cluster].release()
+
+    def fetch(self, cluster, arcid, filename, out, byteRange=None):
+        """
+        Write the file from job's session directory to file object.
+
+        byteRange is a tuple of first and last byte as returned by
+        getByteRange. Return the size of the whole file if known.
+        """
+        url = f'/arex/rest/1.0/jobs/{arcid}/session/{filename}'
+        headers = {}
+        if byteRange:
+            headers['Range'] = _getRangeHeader(*byteRange)
+        httpClient = self._acquire(cluster)
+        reuse = False
+        try:
+            resp = httpClient.request('GET', url, headers=headers)
+            if resp.status == 416:  # range starts after the end of file
+                resp.read()
+                reuse = True
+                return _getContentRangeSize(resp)
+            elif resp.status not in (200, 206):
+                text = resp.read().decode()
+                self.logger.debug(f"Response for {url} - {resp.status} {text}")
+                reuse = True
+                try:
+                    msg = json.loads(text)['msg']
+                except (ValueError, KeyError, TypeError):
+                    raise ACTClientError(f'Error parsing JSON response from {url} - {resp.status} {text}')
+                raise ACTClientError(f'Error fetching {url}: {msg}')
+
+            if resp.status == 206:
+                size = _getContentRangeSize(resp)
+                copyResponse(resp, out)
+            else:
+                size = resp.getheader('Content-Length')
+                size = int(size) if size is not None else None
+                if byteRange:  # server does not support ranges
+                    _copyRange(resp, out, *_getRangeSlice(byteRange, size))
+                else:
+                    copyResponse(resp, out)
+            # connection cannot be reused if the rest of file is not read
+            reuse = resp.isclosed()
+            return size
+        finally:
+            self._release(cluster, httpClient, reuse)
+
+    def close(self):
+        with self.lock:
+            for httpClient in self.clients:
+                httpClient.close()
+            self.clients = []
+            self.idle = {}
+
+
+def copyResponse(resp, out, chunksize=HTTP_BUFFER_SIZE, progress=None):
+    """Write response body to binary file object."""
+    buf = getTransferBuffer(chunksize)
+    nbytes = resp.readinto(buf)
+    while nbytes:
+        out.write(buf[:nbytes])
+        if progress:
+            progress.addBytes(nbytes)
+        nbytes = resp.readinto(buf)
+    _checkComplete(resp)
+
+
+def _checkComplete(resp):
+    # readinto() of HTTP response returns 0 instead of raising if connection
+    # is closed before the whole body is read
+    remaining = getattr(resp, 'length', None)
+    if remaining:
+        raise http.client.IncompleteRead(b'', remaining)
+
+
+def _copyRange(resp, out, start, stop, chunksize=HTTP_BUFFER_SIZE):
+    # write bytes from start up to stop (or end if None) of the response
+    buf = getTransferBuffer(chunksize)
+    offset = 0
+    while stop is None or offset < stop:
+        size = chunksize if stop is None else min(chunksize, stop - offset)
+        nbytes = resp.readinto(buf[:size])
+        if not nbytes:
+            break
+        if offset + nbytes > start:
+            out.write(buf[max(start - offset, 0):nbytes])
+        offset += nbytes
+
+
+def _isResultIncluded(relpath, include, exclude):
+    # * of glob also matches / so *.log matches logs in all directories
+    if include and not any(fnmatch.fnmatchcase(relpath, pattern) for pattern in include):
+        return False
+    return not (exclude and any(fnmatch.fnmatchcase(relpath, pattern) for pattern in exclude))
+
+
+def _isResultDirPruned(dirpath, include, exclude):
+    # dirpath ends with / so that both dir and dir/* exclude the directory
+    for pattern in exclude or []:
+        if fnmatch.fnmatchcase(dirpath, pattern) or fnmatch.fnmatchcase(dirpath[:-1], pattern):
+            return True
+    if not include:
+        return False
+    # Directory is pruned if it is incompatible with literal prefixes of
+    # all include patterns up to the first wildcard.
+    for pattern in include:
+        prefix = re.split(r'[*?[]', pattern, maxsplit=1)[0]
+        if prefix.startswith(dirpath) or dirpath.startswith(prefix):
+            return False
+    return True
+
+
+def _getRangeHeader(start, end):
+    if start is None:
+        return f'bytes=-{end}'
+    elif end is None:
+        return f'bytes={start}-'
+    else:
+        return f'bytes={start}-{end}'
+
+
+def _getRangeSlice(byteRange, size):
+    # convert byte range to start and stop offsets of the whole file
+    start, end = byteRange
+    if start is None:
+        if size is None:
+            return 0, None
+        return max(size - end, 0), None
+    if end is None:
+        return start, None
+    return start, end + 1
+
+
+def _getContentRangeSize(resp):
+    # Content-Range: bytes 0-99/1000 or bytes */1000
+    try:
+        return int(resp.getheader('Content-Range', '').rsplit('/', 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def _isArchive(resp):
+    contentType = resp.getheader('Content-Type', '').split(';')[0].strip()
+    return contentType in ARCHIVE_TYPES
+
+
+def _extractTarStream(resp, dstdir, logger, chunksize=HTTP_BUFFER_SIZE, progress=None):
+    # Members are extracted while the archive is read from the response.
+    # Only regular files and directories inside of destination directory
+    # are extracted.
+    anyFiles = False
+    root = os.path.realpath(dstdir)
+    os.makedirs(root, exist_ok=True)
+    try:
+        with tarfile.open(fileobj=resp, mode='r|*') as tar:
+            for member in tar:
+                path = os.path.realpath(os.path.join(root, member.name))
+                if os.path.commonpath([root, path]) != root:
+                    raise ACTClientError(f'Archive member {member.name} is outside of download directory')
+                if member.isdir():
+                    os.makedirs(path, exist_ok=True)
+                elif member.isfile():
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, 'wb') as f:
+                        copyResponse(tar.extractfile(member), f, chunksize, progress)
+                    logger.debug(f"Extracted {member.name} to {path}")
+                    anyFiles = True
+                else:
+                    logger.debug(f"Skipping archive member {member.name} that is not a file or directory")
+    except tarfile.ReadError:
+        # archive is cut short if connection is closed early
+        _checkComplete(resp)
+        raise
+    return anyFiles
+
+
+def _storeTransferChunks(resp, filename, chunksize=HTTP_BUFFER_SIZE, progress=None):
     try:
         with open(filename, 'wb') as f:
-            chunk = resp.read(chunksize)
-            while chunk:
-                f.write(chunk)
-                chunk = resp.read(chunksize)
+            copyResponse(resp, f, chunksize, progress)
     except Exception as exc:
+        if isTransientError(exc):  # transfer can be retried
+            raise
         raise ACTClientError(f'Error storing transfer chunks to file {filename}: {exc}')
 
 
+def _pwriteChunks(resp, fd, start, end, stop=None, chunksize=HTTP_BUFFER_SIZE, progress=None):
+    buf = getTransferBuffer(chunksize)
+    offset = start
+    while offset < end:
+        if stop and stop.is_set():
+            raise ACTClientError('Transfer of other range failed')
+        nbytes = resp.readinto(buf[:min(chunksize, end - offset)])
+        if not nbytes:
+            raise ACTClientError(f'Transfer ended at byte {offset} instead of {end}')
+        view = buf[:nbytes]
+        while view:
+            written = os.pwrite(fd, view, offset)
+            offset += written
+            view = view[written:]
+        if progress:
+            progress.addBytes(nbytes)
+
+
+def _preallocate(fd, size):
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):  # not supported on platform or filesystem
+        os.ftruncate(fd, size)
+
+
+def _iterJSONArray(resp, chunksize=JSON_BUFFER_SIZE):
+    # Elements of the array are decoded one by one from a buffer that is
+    # refilled from the response when the element is not complete yet.
+    # Decoded part is only removed from the buffer when it is refilled so
+    # that it is not copied for every element.
+    decoder = json.JSONDecoder()
+    textDecoder = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    pos = 0
+    eof = False
+    expected = '['
+    while True:
+        pos = JSON_WHITESPACE.match(buf, pos).end()
+        try:
+            if pos == len(buf):
+                raise ValueError('Incomplete JSON')
+            if expected == '[':
+                if buf[pos] != '[':
+                    raise ACTClientError('Error decoding JSON: response is not an array')
+                pos += 1
+                expected = 'first'
+            elif expected in ('first', 'value'):
+                if expected == 'first' and buf[pos] == ']':
+                    break
+                obj, end = decoder.raw_decode(buf, pos)
+                # Number split between chunks is decoded as its prefix, e.g.
+                # 12 from 12. so the value is only taken when it is followed
+                # by delimiter.
+                nextPos = JSON_WHITESPACE.match(buf, end).end()
+                if not eof and (nextPos == len(buf) or buf[nextPos] not in ',]'):
+                    raise ValueError('Incomplete JSON')
+                pos = end
+                expected = ','
+                yield obj
+            else:
+                if buf[pos] == ']':
+                    break
+                if buf[pos] != ',':
+                    raise ACTClientError('Error decoding JSON: invalid array separator')
+                pos += 1
+                expected = 'value'
+        except ValueError:  # also json.JSONDecodeError
+            if eof:
+                raise ACTClientError('Error decoding JSON: aCT REST might not be running')
+            chunk = resp.read(chunksize)
+            buf = buf[pos:]
+            pos = 0
+            if chunk:
+                buf += textDecoder.decode(chunk)
+            else:
+                eof = True
+                buf += textDecoder.decode(b'', final=True)
+
+    # Trailing newline or end of chunked body can be left in the response
+    # and the connection cannot be used for the next request until it is
+    # read.
+    if not eof:
+        resp.read()
+
+
+def _getJobParams(jobids=[], name='', state='', actionParam=None, clienttab=[], arctab=[]):
+    params = {}
+    if jobids:
+        params['id'] = jobids
+    if name:
+        params['name'] = name
+    if state:
+        params['state'] = state
+    if actionParam:
+        params['action'] = actionParam
+    if clienttab:
+        params['client'] = clienttab
+    if arctab:
+        params['arc'] = arctab
+    return params
+
+
 def _prepareJobs(descs, clusterlist, parser):
-    # read job descriptions into a list of job dictionaries and JSON for
-    # aCT REST
+    # read job descriptions into a list of job dictionaries
     results = []  # resulting list of job dicts
     jobs = []  # a list of jobs being worked on (failed jobs get removed)
-    jsonData = []
     for desc in descs:
         try:
             with open(desc, 'r') as f:
@@ -517,13 +1166,79 @@ def _prepareJobs(descs, clusterlist, parser):
         except Exception as exc:
             results.append({'msg': str(exc), 'descpath': desc, 'cleanup': False})
         else:
-            for descdict in descdicts:
-                job = {'clusterlist': clusterlist, 'descpath': desc, 'cleanup': False}
+            for index, descdict in enumerate(descdicts):
+                job = {'clusterlist': clusterlist, 'descpath': desc, 'index': index, 'cleanup': False}
                 job['desc'] = descdict
                 results.append(job)
                 jobs.append(job)
-                jsonData.append({'clusterlist': clusterlist})
-    return results, jobs, jsonData
+    return results, jobs
+
+
+def _resumeJobs(results, jobs, journal):
+    # Record parsed descriptions and take IDs and uploaded files of jobs
+    # from journal. Jobs that were already submitted are finished.
+    numJobs = {}
+    for job in jobs:
+        numJobs[job['descpath']] = numJobs.get(job['descpath'], 0) + 1
+    for desc, num in numJobs.items():
+        journal.record('parsed', desc=desc, jobs=num)
+
+    for i in range(len(jobs) - 1, -1, -1):
+        state = journal.getJob(jobs[i]['descpath'], jobs[i]['index'])
+        if not state:
+            continue
+        jobs[i]['id'] = state['id']
+        if state['submitted']:
+            jobs[i]['name'] = state['name']
+            jobs.pop(i)
+        else:
+            jobs[i]['uploaded'] = state['uploaded']
+            jobs[i]['cleanup'] = True
+
+
+def _checkInputFiles(job, inputCache):
+    # Return local input files of job by name. Error message is set to job
+    # if source is invalid or local file does not exist. Directories are
+    # packed to tar when uploaded.
+    files = {}
+    for infile in job['desc'].get('inputfiles', []):
+        try:
+            path = inputCache.getLocalPath(infile)
+        except ValueError as e:
+            job['msg'] = f'Error parsing source of file {infile[0]}: {e}'
+            return files
+
+        # skip non local files
+        if path is None:
+            continue
+
+        st = inputCache.stat(path)
+        if st is None or not (stat.S_ISREG(st.st_mode) or stat.S_ISDIR(st.st_mode)):
+            job['msg'] = f'Given path {path} is not a file or directory'
+            return files
+        files[infile[0]] = path
+    return files
+
+
+def _readInlineFiles(job, inputCache, maxSize, budget):
+    # Return base64 encoded small regular local input files of job and their
+    # total size. Files that cannot be inlined are uploaded by uploadJobData.
+    files = {}
+    total = 0
+    for name, path in job['inputs'].items():
+        st = inputCache.stat(path)
+        if not stat.S_ISREG(st.st_mode) or st.st_size > maxSize or total + st.st_size > budget:
+            continue
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(maxSize + 1)
+        except OSError:
+            continue
+        if len(data) > maxSize or total + len(data) > budget:  # file grew
+            continue
+        files[name] = base64.b64encode(data).decode()
+        total += len(data)
+    return files, total
 
 
 def _sublistGenerator(lst, size=100):
@@ -537,6 +1252,9 @@ def _sublistGenerator(lst, size=100):
 
 
 def getACTRestClient(args, conf, useToken=True):
+    if useToken and conf.get('credcache'):
+        # fail fast without a request if token is known to be expired
+        checkTokenExpiry(loadCredCache(conf['credcache']), conf['server'])
     try:
         if useToken:
             with open(conf['token'], 'r') as f:
@@ -544,7 +1262,7 @@ def getACTRestClient(args, conf, useToken=True):
         else:
             token = None
         logger = getLogger(args)
-        actrest = ACTRest(conf['server'], token=token, logger=logger)
+        actrest = ACTRest(conf['server'], token=token, logger=logger, tracer=getTracer(args), retry=getRetryPolicy(args))
     except FileNotFoundError:
         raise ACTClientError(f'Error reading token file {conf["token"]}. Run act proxy.')
     except Exception as exc:
@@ -559,7 +1277,9 @@ def getWebDAVClient(args, conf, webdavBase, useProxy=True):
         else:
             proxypath = None
         logger = getLogger(args)
-        webdavClient = WebDAVClient(webdavBase, proxypath=proxypath, logger=logger)
+        webdavClient = WebDAVClient(
+            webdavBase, proxypath=proxypath, logger=logger, tracer=getTracer(args), retry=getRetryPolicy(args)
+        )
     except FileNotFoundError:
         raise ACTClientError(f'Could not find proxy file {proxypath}')
     except Exception as exc:
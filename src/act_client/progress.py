@@ -0,0 +1,108 @@
+"""
+Progress and throughput reporting for long running operations.
+
+Transfer functions add bytes and commands add finished jobs to a Progress
+object. If stderr is a terminal, a status line with job and byte rates,
+errors and ETA is kept updated there. A summary of the whole operation is
+printed at the end.
+"""
+
+import sys
+import threading
+import time
+
+# minimal time in seconds between redraws of status line
+REDRAW_INTERVAL = 0.5
+
+
+class Progress:
+
+    def __init__(self, total=None, label='jobs', out=None, show=None):
+        self.total = total
+        self.label = label
+        self.out = out if out is not None else sys.stderr
+        self.show = show if show is not None else self.out.isatty()
+        self.lock = threading.RLock()
+        self.start = time.monotonic()
+        self.jobs = 0
+        self.errors = 0
+        self.bytes = 0
+        self.lastDraw = 0
+        self.drawn = False
+
+    def addBytes(self, nbytes):
+        with self.lock:
+            self.bytes += nbytes
+            self._update()
+
+    def addJobs(self, num=1, errors=0):
+        with self.lock:
+            self.jobs += num
+            self.errors += errors
+            self._update(force=True)
+
+    def print(self, *args, **kwargs):
+        """Print to stdout without mixing output with status line."""
+        with self.lock:
+            self._clear()
+            print(*args, **kwargs, flush=True)
+            self._update(force=True)
+
+    def getStatus(self):
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+        jobRate = self.jobs / elapsed
+        byteRate = self.bytes / elapsed / 2 ** 20
+        if self.total:
+            status = f'{self.label} {self.jobs}/{self.total}'
+        else:
+            status = f'{self.label} {self.jobs}'
+        if self.errors:
+            status += f' ({self.errors} errors)'
+        status += f' | {jobRate:.1f} {self.label}/s | {byteRate:.2f} MB/s | {self.bytes / 2 ** 20:.1f} MB'
+        if self.total and self.jobs and self.jobs < self.total:
+            status += f' | ETA {_formatTime((self.total - self.jobs) / jobRate)}'
+        return status
+
+    def getSummary(self, action):
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+        summary = f'{action} {self.jobs} {self.label}'
+        if self.errors:
+            summary += f' ({self.errors} errors)'
+        summary += (
+            f' in {_formatTime(elapsed)}: {self.jobs / elapsed:.2f} {self.label}/s,'
+            f' {self.bytes / 2 ** 20:.1f} MB at {self.bytes / elapsed / 2 ** 20:.2f} MB/s'
+        )
+        return summary
+
+    def finish(self, action):
+        with self.lock:
+            self._clear()
+            self.show = False
+        print(self.getSummary(action), flush=True)
+
+    def _update(self, force=False):
+        if not self.show:
+            return
+        now = time.monotonic()
+        if not force and now - self.lastDraw < REDRAW_INTERVAL:
+            return
+        self.lastDraw = now
+        sys.stdout.flush()
+        self.out.write(f'\r\033[K{self.getStatus()}')
+        self.out.flush()
+        self.drawn = True
+
+    def _clear(self):
+        if self.drawn:
+            self.out.write('\r\033[K')
+            self.out.flush()
+            self.drawn = False
+
+
+def _formatTime(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f'{seconds // 3600}h{seconds % 3600 // 60:02d}m'
+    elif seconds >= 60:
+        return f'{seconds // 60}m{seconds % 60:02d}s'
+    return f'{seconds}s'
@@ -0,0 +1,174 @@
+"""
+Retries of failed HTTP requests.
+
+Requests that fail with a connection error or a transient status (429, 502,
+503, 504) are retried with exponential backoff and jitter. Only idempotent
+requests are retried unless the connection was refused and the request was
+therefore never sent. Consecutive failures are counted per host by a circuit
+breaker. When there are too many, requests to the host fail immediately
+until the cooldown period passes instead of every one of them waiting for
+all its retries.
+"""
+
+import http.client
+import random
+import socket
+import threading
+import time
+
+from act_client.common import (BREAKER_COOLDOWN, BREAKER_THRESHOLD,
+                               RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+                               ACTClientError)
+from act_client.tracing import TracedHTTPClient
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PROPFIND', 'PUT', 'DELETE')
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# circuit breakers are shared by all clients of a program
+_breakers = {}
+_breakersLock = threading.Lock()
+
+
+class RetryPolicy:
+
+    def __init__(self, retries=RETRIES, baseDelay=RETRY_BASE_DELAY, maxDelay=RETRY_MAX_DELAY):
+        self.retries = max(retries, 0)
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+
+    def getDelay(self, attempt, retryAfter=None):
+        if retryAfter is not None:
+            return min(retryAfter, self.maxDelay)
+        # full jitter spreads retries of concurrent clients
+        return random.uniform(0, min(self.maxDelay, self.baseDelay * 2 ** attempt))
+
+
+class CircuitBreaker:
+
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.openUntil = 0
+
+    def check(self):
+        # After cooldown, requests are let through again. A single failure
+        # opens the breaker again and a success closes it.
+        with self.lock:
+            remaining = self.openUntil - time.monotonic()
+            if self.failures >= self.threshold and remaining > 0:
+                raise ACTClientError(
+                    f'Too many failed requests to {self.name}, not trying again for {remaining:.0f}s'
+                )
+
+    def recordSuccess(self):
+        with self.lock:
+            self.failures = 0
+
+    def recordFailure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.openUntil = time.monotonic() + self.cooldown
+
+
+class RetryHTTPClient(TracedHTTPClient):
+    """
+    TracedHTTPClient that retries failed requests according to policy.
+
+    Every attempt is a separate span when traced. The idempotent parameter
+    of request() overrides the default given by the method.
+    """
+
+    def __init__(self, *args, retry=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.retryLogger = kwargs.get('logger')
+        self.breaker = getCircuitBreaker(self.conn.host, self.conn.port)
+
+    def request(self, method, endpoint, idempotent=None, **kwargs):
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        rewind = _getRewind(kwargs.get('data'))
+        if rewind is None:  # body cannot be sent again
+            idempotent = False
+
+        attempt = 0
+        while True:
+            self.breaker.check()
+            try:
+                resp = super().request(method, endpoint, **kwargs)
+            except Exception as exc:
+                if not isTransientError(exc):
+                    raise
+                self.breaker.recordFailure()
+                # request was not sent if connection was refused
+                canRetry = idempotent or isinstance(exc, ConnectionRefusedError)
+                if attempt >= self.retry.retries or not canRetry:
+                    raise
+                delay = self.retry.getDelay(attempt)
+                reason = str(exc) or type(exc).__name__
+            else:
+                if resp.status not in RETRY_STATUSES:
+                    self.breaker.recordSuccess()
+                    return resp
+                self.breaker.recordFailure()
+                if attempt >= self.retry.retries or not idempotent:
+                    return resp
+                delay = self.retry.getDelay(attempt, _getRetryAfter(resp))
+                reason = f'status {resp.status}'
+                resp.read()  # connection can be reused
+
+            if self.retryLogger:
+                self.retryLogger.debug(
+                    f'Retrying {method} {endpoint} in {delay:.2f}s after {reason} '
+                    f'(retry {attempt + 1} of {self.retry.retries})'
+                )
+            time.sleep(delay)
+            # body that cannot be rewound is only retried after refused
+            # connection when none of it was read
+            if rewind:
+                rewind()
+            attempt += 1
+
+
+def isTransientError(exc):
+    # Only failures of transport are transient. Errors of connection state
+    # like ResponseNotReady mean that the request might have been sent
+    # already or that the client misused the connection.
+    return isinstance(exc, (ConnectionError, TimeoutError, socket.timeout, http.client.IncompleteRead))
+
+
+def getCircuitBreaker(host, port):
+    name = f'{host}:{port}'
+    with _breakersLock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def getRetryPolicy(args):
+    retries = getattr(args, 'retries', None)
+    if retries is None:
+        return RetryPolicy()
+    return RetryPolicy(retries=retries)
+
+
+def _getRewind(data):
+    if data is None or isinstance(data, (bytes, bytearray, memoryview, str)):
+        return lambda: None
+    try:
+        pos = data.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+    return lambda: data.seek(pos)
+
+
+def _getRetryAfter(resp):
+    value = resp.getheader('Retry-After')
+    try:
+        return max(float(value), 0)
+    except (TypeError, ValueError):  # missing or HTTP date
+        return None
@@ -0,0 +1,162 @@
+"""
+Tar archives of directories that are packed while they are uploaded.
+
+TarStream is passed to HTTP client as request body. It is iterated over in
+chunks which are sent with chunked transfer encoding, so the archive is never
+stored on disk or in memory as a whole. Tar headers and padding are built
+directly instead of with tarfile.TarFile which would copy every file in a
+single write. Every iteration starts at the offset that the stream was
+rewound to so that the request can be retried.
+"""
+
+import os
+import stat
+import tarfile
+import zlib
+
+from act_client.common import HTTP_BUFFER_SIZE, ACTClientError
+
+# headers, padding and small files are joined into chunks of at least this
+# size instead of being sent as separate HTTP chunks
+MIN_CHUNK_SIZE = 2 ** 16  # 64KB
+
+
+class TarStream:
+
+    def __init__(self, path, compress=False, progress=None, chunkSize=HTTP_BUFFER_SIZE):
+        self.path = path
+        self.compress = compress
+        self.progress = progress
+        self.chunkSize = chunkSize
+        self.offset = 0
+
+    def __iter__(self):
+        # archive is packed again and bytes before offset are skipped
+        skip = self.offset
+        for chunk in _coalesce(self._iterArchive(), MIN_CHUNK_SIZE):
+            if skip:
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk = chunk[skip:]
+                skip = 0
+            if self.progress:
+                self.progress.addBytes(len(chunk))
+            yield chunk
+
+    def tell(self):
+        return self.offset
+
+    def seek(self, offset):
+        self.offset = offset
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _iterArchive(self):
+        if not self.compress:
+            yield from self._iterTar()
+            return
+        compressor = zlib.compressobj(wbits=31)  # gzip container
+        for chunk in self._iterTar():
+            chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+
+    def _iterTar(self):
+        # members are named relative to parent of directory like with
+        # tar -c dirname
+        root = os.path.abspath(self.path)
+        parent = os.path.dirname(root)
+        size = 0
+        for dirpath, dirnames, filenames in os.walk(root, onerror=_raiseWalkError):
+            dirnames.sort()
+            names = [dirpath] + [os.path.join(dirpath, name) for name in sorted(filenames)]
+            # symlinks to directories are listed in dirnames and not followed
+            names.extend(
+                os.path.join(dirpath, name) for name in dirnames
+                if os.path.islink(os.path.join(dirpath, name))
+            )
+            for path in names:
+                arcname = os.path.relpath(path, parent)
+                for chunk in self._iterMember(path, arcname):
+                    size += len(chunk)
+                    yield chunk
+
+        # end of archive and padding to record size like tarfile
+        end = 2 * tarfile.BLOCKSIZE
+        size += end
+        remainder = size % tarfile.RECORDSIZE
+        if remainder:
+            end += tarfile.RECORDSIZE - remainder
+        yield tarfile.NUL * end
+
+    def _iterMember(self, path, arcname):
+        try:
+            st = os.lstat(path)
+        except OSError as exc:
+            raise ACTClientError(f'Error reading {path}: {exc}')
+        info = tarfile.TarInfo(arcname)
+        info.mode = stat.S_IMODE(st.st_mode)
+        info.mtime = int(st.st_mtime)  # float would need extra pax header
+        if stat.S_ISDIR(st.st_mode):
+            info.type = tarfile.DIRTYPE
+        elif stat.S_ISLNK(st.st_mode):
+            info.type = tarfile.SYMTYPE
+            info.linkname = os.readlink(path)
+        elif stat.S_ISREG(st.st_mode):
+            info.size = st.st_size
+        else:  # sockets, devices and pipes cannot be inputs
+            return
+        yield info.tobuf(tarfile.PAX_FORMAT, tarfile.ENCODING, 'surrogateescape')
+        if info.type != tarfile.REGTYPE:
+            return
+
+        # The size in header is already sent so exactly that many bytes have
+        # to follow even if the file changes.
+        remaining = info.size
+        try:
+            with open(path, 'rb') as f:
+                while remaining:
+                    chunk = f.read(min(self.chunkSize, remaining))
+                    if not chunk:
+                        raise ACTClientError(f'File {path} shrank while it was uploaded')
+                    remaining -= len(chunk)
+                    yield chunk
+        except OSError as exc:
+            raise ACTClientError(f'Error reading {path}: {exc}')
+        remainder = info.size % tarfile.BLOCKSIZE
+        if remainder:
+            yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+
+
+def _coalesce(chunks, minSize):
+    pending = []
+    pendingSize = 0
+    for chunk in chunks:
+        if len(chunk) >= minSize:
+            if pending:
+                yield b''.join(pending)
+                pending = []
+                pendingSize = 0
+            yield chunk
+            continue
+        pending.append(chunk)
+        pendingSize += len(chunk)
+        if pendingSize >= minSize:
+            yield b''.join(pending)
+            pending = []
+            pendingSize = 0
+    if pending:
+        yield b''.join(pending)
+
+
+def _raiseWalkError(exc):
+    raise ACTClientError(f'Error reading {exc.filename}: {exc}')
@@ -0,0 +1,180 @@
+"""
+Timing and tracing of HTTP requests.
+
+Every request made by a traced client produces a span: a dictionary with
+method, host, path, status, bytes sent and received, connect time (including
+TLS handshake), time to first byte and total time until the response body is
+read. Spans are passed to callbacks registered on a Tracer. JSONLExporter is
+a callback that appends spans to a JSON lines file.
+"""
+
+import json
+import os
+import threading
+import time
+
+from pyarcrest.http import HTTPClient
+
+from act_client.common import ACTClientError
+from act_client.upload import FileBody
+
+# tracers are shared by all clients of a program that write to the same file
+_tracers = {}
+
+
+class Tracer:
+
+    def __init__(self, callbacks=None):
+        self.callbacks = list(callbacks or [])
+
+    def addCallback(self, callback):
+        self.callbacks.append(callback)
+
+    def emit(self, span):
+        for callback in self.callbacks:
+            callback(span)
+
+
+class JSONLExporter:
+
+    def __init__(self, path):
+        try:
+            self.file = open(path, 'a')
+        except OSError as exc:
+            raise ACTClientError(f'Error opening trace file {path}: {exc}')
+        self.lock = threading.Lock()
+
+    def __call__(self, span):
+        line = json.dumps(span)
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class TracedHTTPClient(HTTPClient):
+    """
+    HTTPClient that reports spans of requests to tracer if given.
+
+    FileBody is sent with Content-Length header over connection of client.
+    """
+
+    def __init__(self, *args, tracer=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tracer = tracer
+        self.pending = None
+
+    def request(self, method, endpoint, **kwargs):
+        data = kwargs.get('data')
+        if isinstance(data, FileBody):
+            # iterable body without length would be sent chunked
+            data.conn = self.conn
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), 'Content-Length': str(data.getLength())}
+
+        if not self.tracer:
+            return super().request(method, endpoint, **kwargs)
+
+        # response of previous request will not be read anymore
+        self._finishPending()
+
+        span = {
+            'method': method,
+            'host': self.conn.host,
+            'port': self.conn.port,
+            'path': endpoint.split('?')[0],
+            'status': None,
+            'bytesOut': _getBodySize(kwargs.get('data')),
+            'bytesIn': 0,
+            'start': time.time(),
+            'connectTime': None,
+            'ttfb': None,
+            'totalTime': None,
+        }
+        start = time.perf_counter()
+        try:
+            if self.conn.sock is None:
+                self.conn.connect()
+                span['connectTime'] = time.perf_counter() - start
+            resp = super().request(method, endpoint, **kwargs)
+        except Exception as exc:
+            span['totalTime'] = time.perf_counter() - start
+            span['error'] = str(exc)
+            self.tracer.emit(span)
+            raise
+        span['ttfb'] = time.perf_counter() - start
+        span['status'] = resp.status
+
+        self.pending = TracedResponse(resp, span, start, self.tracer)
+        return self.pending
+
+    def _finishPending(self):
+        if self.pending is not None:
+            self.pending.finish()
+            self.pending = None
+
+    def close(self):
+        self._finishPending()
+        super().close()
+
+
+class TracedResponse:
+    """Wrapper of HTTP response that counts received body bytes."""
+
+    def __init__(self, resp, span, start, tracer):
+        self.resp = resp
+        self.span = span
+        self.start = start
+        self.tracer = tracer
+        self.finished = False
+
+    def __getattr__(self, name):
+        return getattr(self.resp, name)
+
+    def read(self, *args):
+        data = self.resp.read(*args)
+        self.span['bytesIn'] += len(data)
+        if not data or self.resp.isclosed():
+            self.finish()
+        return data
+
+    def readinto(self, buf):
+        nbytes = self.resp.readinto(buf)
+        self.span['bytesIn'] += nbytes
+        if not nbytes or self.resp.isclosed():
+            self.finish()
+        return nbytes
+
+    def close(self):
+        self.finish()
+        self.resp.close()
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        self.span['totalTime'] = time.perf_counter() - self.start
+        if not self.resp.isclosed():
+            self.span['incomplete'] = True
+        self.tracer.emit(self.span)
+
+
+def _getBodySize(data):
+    if data is None:
+        return 0
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return len(data)
+    try:
+        return os.fstat(data.fileno()).st_size - data.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def getTracer(args):
+    path = getattr(args, 'trace', None)
+    if not path:
+        return None
+    if path not in _tracers:
+        _tracers[path] = Tracer([JSONLExporter(path)])
+    return _tracers[path]
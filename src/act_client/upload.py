@@ -0,0 +1,159 @@
+"""
+Request bodies for upload of job input files.
+
+Python file objects given to http.client are read in 8KB blocks and sent with
+chunked transfer encoding, every block copied into a new chunk. FileBody is
+sent with known length instead. Over plain HTTP the kernel copies the file
+to the socket with sendfile. Over TLS, where data has to be encrypted in user
+space, the file is read to a reused buffer and sent in large slices. Files are
+not memory mapped because a file truncated while mapped kills the process
+with SIGBUS.
+
+InputFileCache keeps classification of input file sources and stat of local
+files for one submission.
+"""
+
+import os
+import ssl
+from urllib.parse import urlparse
+
+from act_client.common import HTTP_BUFFER_SIZE, ACTClientError, getTransferBuffer
+from act_client.tarstream import TarStream
+
+# file names with these suffixes are compressed with gzip
+GZIP_SUFFIXES = ('.gz', '.tgz')
+
+
+class FileBody:
+    """
+    Iterable request body with contents of regular file.
+
+    TracedHTTPClient sets Content-Length header and the connection that
+    is used for sendfile. Every iteration starts at the offset that the body
+    was rewound to so that the request can be retried.
+    """
+
+    def __init__(self, f, progress=None, chunkSize=HTTP_BUFFER_SIZE):
+        self.f = f
+        self.progress = progress
+        self.chunkSize = chunkSize
+        self.offset = f.tell()
+        self.size = os.fstat(f.fileno()).st_size
+        self.conn = None
+
+    def __iter__(self):
+        sock = self.conn.sock if self.conn else None
+        if sock is not None and not isinstance(sock, ssl.SSLSocket):
+            yield from self._sendfile(sock)
+            return
+
+        buf = getTransferBuffer(self.chunkSize)
+        self.f.seek(self.offset)
+        remaining = self.size - self.offset
+        while remaining:
+            nbytes = self.f.readinto(buf[:min(len(buf), remaining)])
+            if not nbytes:
+                raise ACTClientError(f'File {self.f.name} shrank while it was uploaded')
+            remaining -= nbytes
+            if self.progress:
+                self.progress.addBytes(nbytes)
+            yield buf[:nbytes]
+
+    def _sendfile(self, sock):
+        # Headers are already sent when body is iterated. The body is sent
+        # directly to socket and nothing is yielded to HTTP client.
+        pos = self.offset
+        while pos < self.size:
+            sent = sock.sendfile(self.f, pos, min(self.chunkSize, self.size - pos))
+            if not sent:
+                raise ACTClientError(f'File {self.f.name} shrank while it was uploaded')
+            pos += sent
+            if self.progress:
+                self.progress.addBytes(sent)
+        return
+        yield
+
+    def getLength(self):
+        return self.size - self.offset
+
+    def fileno(self):
+        return self.f.fileno()
+
+    def tell(self):
+        return self.offset
+
+    def seek(self, offset):
+        self.offset = offset
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class InputFileCache:
+    """
+    Local paths of input file sources and their stat results.
+
+    Jobs of bulk submissions usually share input files. Every source is parsed
+    and every path is stat-ed only once, which saves many metadata requests
+    on network file systems. Changes of files during submission are not seen.
+    """
+
+    def __init__(self):
+        self.paths = {}  # source -> local path, None if remote
+        self.errors = {}  # source -> error of invalid URL
+        self.stats = {}  # path -> stat result, None if it cannot be stat-ed
+
+    def getLocalPath(self, infile):
+        """
+        Return local path of input file or None for remote resource.
+
+        Source is remote if it has a scheme or hostname. ValueError is
+        raised for invalid URL.
+        """
+        source = infile[1] or infile[0]
+        if source in self.errors:
+            raise ValueError(self.errors[source])
+        if source not in self.paths:
+            try:
+                url = urlparse(source)
+            except ValueError as exc:
+                self.errors[source] = str(exc)
+                raise
+            if url.scheme not in ('file', None, '') or url.hostname:
+                self.paths[source] = None
+            else:
+                self.paths[source] = url.path
+        return self.paths[source]
+
+    def stat(self, path):
+        if path not in self.stats:
+            try:
+                self.stats[path] = os.stat(path)
+            except OSError:
+                self.stats[path] = None
+        return self.stats[path]
+
+
+def openUpload(path, name, progress=None):
+    """
+    Return request body for upload of input file.
+
+    Directories are packed into tar stream, compressed if name has gzip suffix.
+    """
+    if os.path.isdir(path):
+        return TarStream(path, compress=name.endswith(GZIP_SUFFIXES), progress=progress)
+    try:
+        f = open(path, 'rb')
+    except Exception as exc:
+        raise ACTClientError(f'Error opening file {path}: {exc}')
+    try:
+        return FileBody(f, progress)
+    except OSError as exc:
+        f.close()
+        raise ACTClientError(f'Error opening file {path}: {exc}')
@@ -0,0 +1,74 @@
+import http.server
+import io
+import json
+import threading
+
+import pytest
+
+from act_client.common import ACTClientError
+from act_client.mockserver import MockHTTPServer
+from act_client.operations import ACTRest, _iterJSONArray
+
+
+ELEMENTS = [12.5, 3, -0.25e-3, 'ž', {'a': [1, 2]}, None, True, 1234567]
+
+
+@pytest.mark.parametrize('chunksize', range(1, 40))
+def test_iterJSONArrayChunkBoundaries(chunksize):
+    body = json.dumps(ELEMENTS, ensure_ascii=False).encode()
+    assert list(_iterJSONArray(io.BytesIO(body), chunksize)) == ELEMENTS
+
+
+def test_iterJSONArraySplitNumber():
+    assert list(_iterJSONArray(io.BytesIO(b'[12.5, 3]'), 4)) == [12.5, 3]
+
+
+@pytest.mark.parametrize('chunksize', [1, 3, 7, 2 ** 16])
+def test_iterJSONArrayReadsTrailingWhitespace(chunksize):
+    resp = io.BytesIO(b' [ 1 , 23 ] \n')
+    assert list(_iterJSONArray(resp, chunksize)) == [1, 23]
+    assert resp.read() == b''
+
+
+@pytest.mark.parametrize('body', [b'', b'{}', b'[1 2]', b'[1,', b'[12.5 3]'])
+def test_iterJSONArrayInvalid(body):
+    with pytest.raises(ACTClientError):
+        list(_iterJSONArray(io.BytesIO(body), 2))
+
+
+class ArrayHandler(http.server.BaseHTTPRequestHandler):
+    """Send JSON array with trailing newline like Flask jsonify."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests += 1
+        # the newline is the only byte left after the last full read
+        body = b'["' + b'x' * (2 ** 16 - 4) + b'"]\n'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_streamRequestReusesConnection():
+    server = MockHTTPServer(('127.0.0.1', 0), ArrayHandler)
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    actrest = ACTRest(f'http://{host}:{port}')
+    try:
+        for _ in range(3):
+            jobs, status = actrest.streamRequest('GET', '/jobs')
+            assert status == 200
+            assert len(list(jobs)) == 1
+        assert server.requests == 3
+    finally:
+        actrest.close()
+        server.shutdown()
+        server.server_close()
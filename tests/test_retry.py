@@ -0,0 +1,28 @@
+import http.client
+import socket
+
+import pytest
+
+from act_client.retry import isTransientError
+
+
+@pytest.mark.parametrize('exc', [
+    http.client.RemoteDisconnected(),
+    http.client.IncompleteRead(b''),
+    ConnectionResetError(),
+    ConnectionRefusedError(),
+    BrokenPipeError(),
+    socket.timeout(),
+])
+def test_transportErrorsAreTransient(exc):
+    assert isTransientError(exc)
+
+
+@pytest.mark.parametrize('exc', [
+    http.client.ResponseNotReady(),
+    http.client.CannotSendRequest(),
+    http.client.CannotSendHeader(),
+    http.client.ImproperConnectionState(),
+])
+def test_connectionStateErrorsAreNotTransient(exc):
+    assert not isTransientError(exc)